@@ -1,22 +1,105 @@
 import os
+import io
 import json
 import time
 import threading
 import uuid
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 import tempfile
 import networkx as nx
-from network_generation.triplet_model import RandomGraphGenerator, motifs
+import numpy as np
+from network_generation.triplet_model import SubgraphStructure, motifs
 from network_generation.utils import graph_to_json, calculate_graph_metrics
+from network_generation.labels import intern_graph_json, intern_graph
+from network_generation.census import MOTIF_AUTOMORPHISMS, graph_to_arrays, triad_census
+from network_generation.null_model import motif_significance
+from network_generation.cache import ResultCache, graph_hash
+from network_generation.report import report_rows, iter_csv, write_xlsx
+from network_generation.jobs import (LocalJobStore, SQLiteJobStore, LocalEventBus, SQLiteEventBus,
+                                     execute_generation)
+from network_generation.cost import graph_profile, estimate_costs, plan_analysis, plan_generation
+from network_generation.participation import ParticipationIndex
 
 app = Flask(__name__, static_folder='../frontend', static_url_path='')
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
-# Словарь для хранения прогресса по сессиям
-progress_data = {}
+# Состояние задач и рассылка событий. По умолчанию всё хранится в этом процессе;
+# если задан общий файл SQLite, генерацию выполняют отдельные вычислительные
+# процессы (python -m network_generation.worker), а события приходят через очередь
+JOB_DB = os.environ.get('NETWORK_GENERATION_JOB_DB')
+if JOB_DB:
+    job_store = SQLiteJobStore(JOB_DB)
+    event_bus = SQLiteEventBus(job_store)
+    event_bus.pump(socketio)
+else:
+    job_store = LocalJobStore()
+    event_bus = LocalEventBus(socketio)
+
+# Число нуль-графов для оценки значимости мотивов по умолчанию и наибольшее допустимое
+DEFAULT_NULL_SAMPLES = 20
+MAX_NULL_SAMPLES = 1000
+
+# Число вершин с наибольшим участием в каждом мотиве в ответе анализа и размер страницы участия
+DEFAULT_TOP_K = 10
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Кэш переписей мотивов и метрик по хэшу графа
+result_cache = ResultCache()
+# Матрицы участия вершин занимают 128 байт на вершину, поэтому хранятся отдельно и ограничены по объёму
+participation_cache = ResultCache(max_entries=32,
+                                  max_bytes=int(os.environ.get('PARTICIPATION_CACHE_MB', 512)) * 2 ** 20)
+
+# Лимиты стоимости одного запроса анализа или генерации
+app.config['MAX_REQUEST_SECONDS'] = float(os.environ.get('MAX_REQUEST_SECONDS', 120))
+app.config['MAX_REQUEST_MEMORY_MB'] = float(os.environ.get('MAX_REQUEST_MEMORY_MB', 2048))
+# Сколько секунд /api/generate ждёт результата (задача может стоять в очереди вычислительных процессов)
+app.config['GENERATION_WAIT_SECONDS'] = float(os.environ.get('GENERATION_WAIT_SECONDS', 600))
+
+
+def request_limits():
+    return {
+        'seconds': app.config['MAX_REQUEST_SECONDS'],
+        'memory_bytes': app.config['MAX_REQUEST_MEMORY_MB'] * 2 ** 20
+    }
+
+
+def requested_null_samples(data):
+    """Число нуль-графов из запроса, ограниченное диапазоном 0..MAX_NULL_SAMPLES"""
+    return min(max(0, int(data.get('null_samples', DEFAULT_NULL_SAMPLES))), MAX_NULL_SAMPLES)
+
+
+def plan_generation_request(profile, budget):
+    """Оценивает стоимость генерации и подбирает движок переписи и бюджет времени под лимиты"""
+    plan = plan_generation(profile, request_limits(), budget['time_budget'], budget['batch_size'])
+    return plan, dict(budget, time_budget=plan['time_budget'])
+
+
+def generation_payload(original_graph, budget, seed, plan):
+    """Задача для общей очереди вычислительных процессов; в однопроцессном режиме не нужна"""
+    if not job_store.shared:
+        return None
+    return {'original_graph': original_graph, 'budget': budget, 'seed': seed, 'engine': plan['engine']}
+
+
+def generation_budget(data):
+    """Извлекает из запроса бюджеты генерации (время в с, число итераций) и размер пакета троек"""
+    time_budget = data.get('time_budget')
+    iteration_budget = data.get('iteration_budget')
+    batch_size = data.get('batch_size')
+    return {
+        'time_budget': float(time_budget) if time_budget is not None else None,
+        'iteration_budget': int(iteration_budget) if iteration_budget is not None else None,
+        'batch_size': int(batch_size) if batch_size else None
+    }
+
+
+def generation_key(original_graph, budget, seed):
+    """Ключ для объединения одинаковых запросов генерации"""
+    return graph_hash(original_graph), seed, budget['time_budget'], budget['iteration_budget'], budget['batch_size']
 
 
 @app.route('/api/generate_stream', methods=['POST'])
@@ -25,99 +108,63 @@ def generate_graph_stream():
     data = request.json
     original_graph = data.get('original_graph')
     session_id = data.get('session_id') or str(uuid.uuid4())
+    budget = generation_budget(data)
+    seed = data.get('seed')
 
     if not original_graph:
         return jsonify({'error': 'No graph data provided'}), 400
 
+    # Граф переводится в номера один раз: для оценки стоимости (слишком дорогие запросы отклоняются
+    # или получают ограниченный бюджет) и для самой генерации
+    try:
+        G, labels = intern_graph_json(original_graph)
+        profile = graph_profile(G)
+        plan, budget = plan_generation_request(profile, budget)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if not plan['admitted']:
+        return jsonify({'error': plan['reason'], 'cost': plan}), 413
+
+    # Одинаковые одновременные запросы присоединяются к уже идущей генерации
+    job, leader = job_store.join(generation_key(original_graph, budget, seed),
+                                 generation_payload(original_graph, budget, seed, plan), session_id)
+
     # Инициализируем прогресс для этой сессии
-    progress_data[session_id] = {
+    job_store.set_session_state(session_id, job_store.job_progress(job) or {
         'progress': 0,
         'current': 0,
-        'total': 0,
+        'total': profile['num_edges'],
         'status': 'starting'
-    }
+    })
+
+    if not leader:
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'message': 'Attached to running generation',
+            'cost': plan
+        })
+
+    if job_store.shared:
+        # Задачу заберёт один из вычислительных процессов
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'message': 'Generation queued',
+            'cost': plan
+        })
 
     # Запускаем генерацию в отдельном потоке
-    def generate_in_thread():
-        try:
-            # Восстанавливаем граф из JSON
-            G = nx.DiGraph()
-            for node in original_graph['nodes']:
-                G.add_node(node['id'])
-            for edge in original_graph['edges']:
-                G.add_edge(edge['source'], edge['target'])
-
-            total_edges = len(G.edges())
-
-            # Обновляем общее количество ребер
-            progress_data[session_id]['total'] = total_edges
-            progress_data[session_id]['status'] = 'generating'
-
-            # Создаем генератор с callback для прогресса
-            generator = RandomGraphGenerator(G, motifs)
-
-            def progress_callback(current, total):
-                progress = min(100, int((current / total) * 100))
-                progress_data[session_id] = {
-                    'progress': progress,
-                    'current': current,
-                    'total': total,
-                    'status': 'generating'
-                }
-                # Отправляем обновление через WebSocket
-                socketio.emit('generation_progress', {
-                    'session_id': session_id,
-                    'progress': progress,
-                    'current': current,
-                    'total': total,
-                    'status': 'generating'
-                })
-                time.sleep(0.001)  # Небольшая задержка для UI
-
-            generator.set_progress_callback(progress_callback)
-
-            # Генерируем граф
-            new_G = generator.wegner_multiplet_model()
-
-            # Рассчитываем метрики
-            metrics = calculate_graph_metrics(new_G)
-            graph_json = graph_to_json(new_G)
-
-            # Обновляем статус
-            progress_data[session_id]['status'] = 'complete'
-
-            # Отправляем финальный результат
-            socketio.emit('generation_complete', {
-                'session_id': session_id,
-                'success': True,
-                'metrics': metrics,
-                'graph': graph_json,
-                'status': 'complete'
-            })
-
-        except Exception as e:
-            progress_data[session_id]['status'] = 'error'
-            socketio.emit('generation_error', {
-                'session_id': session_id,
-                'error': str(e),
-                'status': 'error'
-            })
-        finally:
-            # Не удаляем сразу, чтобы фронтенд мог получить последнее состояние
-            # Удалим через некоторое время
-            time.sleep(5)
-            if session_id in progress_data:
-                del progress_data[session_id]
-
-    # Запускаем поток
-    thread = threading.Thread(target=generate_in_thread)
+    thread = threading.Thread(target=execute_generation,
+                              args=(job_store, event_bus, job, G, labels, budget, seed, plan['engine']))
     thread.daemon = True
     thread.start()
 
     return jsonify({
         'success': True,
         'session_id': session_id,
-        'message': 'Generation started'
+        'message': 'Generation started',
+        'cost': plan
     })
 
 
@@ -132,11 +179,21 @@ def handle_disconnect():
     print('Client disconnected')
 
 
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Подписывает клиента на события его сессии генерации (комната socket.io с именем session_id)"""
+    session_id = data.get('session_id')
+    if session_id:
+        join_room(session_id)
+    return {'session_id': session_id}
+
+
 @socketio.on('get_progress')
 def handle_get_progress(data):
     session_id = data.get('session_id')
-    if session_id and session_id in progress_data:
-        emit('progress_update', progress_data[session_id])
+    state = job_store.session_state(session_id) if session_id else None
+    if state is not None:
+        emit('progress_update', state)
     else:
         emit('progress_update', {
             'progress': 0,
@@ -152,33 +209,30 @@ def generate_graph():
     """Генерация нового графа (legacy endpoint)"""
     data = request.json
     original_graph = data.get('original_graph')
+    budget = generation_budget(data)
+    seed = data.get('seed')
 
     if not original_graph:
         return jsonify({'error': 'No graph data provided'}), 400
 
     try:
-        # Восстанавливаем граф из JSON
-        G = nx.DiGraph()
-        for node in original_graph['nodes']:
-            G.add_node(node['id'])
-        for edge in original_graph['edges']:
-            G.add_edge(edge['source'], edge['target'])
-
-        # Генерируем новый граф
-        generator = RandomGraphGenerator(G, motifs)
-        new_G = generator.wegner_multiplet_model()
-
-        # Рассчитываем метрики
-        metrics = calculate_graph_metrics(new_G)
+        # Слишком дорогие запросы отклоняются или получают ограниченный бюджет
+        G, labels = intern_graph_json(original_graph)
+        plan, budget = plan_generation_request(graph_profile(G), budget)
+        if not plan['admitted']:
+            return jsonify({'error': plan['reason'], 'cost': plan}), 413
+
+        # Одинаковые одновременные запросы получают результат одной генерации
+        job, leader = job_store.join(generation_key(original_graph, budget, seed),
+                                     generation_payload(original_graph, budget, seed, plan))
+        if leader and not job_store.shared:
+            execute_generation(job_store, event_bus, job, G, labels, budget, seed, plan['engine'])
+        try:
+            result = job_store.wait(job, timeout=app.config['GENERATION_WAIT_SECONDS'])
+        except TimeoutError as e:
+            return jsonify({'error': str(e)}), 504
 
-        # Конвертируем в JSON
-        graph_json = graph_to_json(new_G)
-
-        return jsonify({
-            'success': True,
-            'metrics': metrics,
-            'graph': graph_json
-        })
+        return jsonify(dict(result, success=True, cost=plan))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -195,7 +249,7 @@ def upload_graph():
         return jsonify({'error': 'No file selected'}), 400
 
     # Сохраняем файл временно
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f'{uuid.uuid4().hex}_{os.path.basename(file.filename)}')
     file.save(filepath)
 
     try:
@@ -209,12 +263,13 @@ def upload_graph():
             G = nx.read_gexf(filepath)
         else:
             return jsonify({'error': 'Unsupported file format'}), 400
+        G, labels = intern_graph(G)
 
         # Рассчитываем метрики
         metrics = calculate_graph_metrics(G)
 
         # Конвертируем граф в JSON для фронтенда
-        graph_json = graph_to_json(G)
+        graph_json = graph_to_json(G, labels)
 
         return jsonify({
             'success': True,
@@ -235,41 +290,249 @@ def analyze_graph():
     """Анализ мотивов в графе"""
     data = request.json
     graph_data = data.get('graph')
+    null_samples = requested_null_samples(data)
+    seed = data.get('seed')
+    participation = bool(data.get('participation', False))
+    top_k = int(data.get('top_k', DEFAULT_TOP_K))
 
     if not graph_data:
         return jsonify({'error': 'No graph data provided'}), 400
 
     try:
         # Восстанавливаем граф из JSON
-        G = nx.DiGraph()
-        for node in graph_data['nodes']:
-            G.add_node(node['id'])
-        for edge in graph_data['edges']:
-            G.add_edge(edge['source'], edge['target'])
-
-        # Анализ мотивов
-        generator = RandomGraphGenerator(G, motifs)
-        structure = generator.subgraphStructure
+        G, labels = intern_graph_json(graph_data)
+
+        # Слишком дорогие запросы отклоняются или переводятся на более дешёвый режим
+        plan = plan_analysis(graph_profile(G), request_limits(), null_samples, participation)
+        if not plan['admitted']:
+            return jsonify({'error': plan['reason'], 'cost': plan}), 413
+        null_samples = plan['null_samples']
+
+        # Анализ мотивов (с участием вершин — тем же проходом переписи)
+        structure = SubgraphStructure(G, motifs, plan['engine'], participation)
+
+        counts = [motif.count for motif in structure.motif_subgraphs.values()]
+
+        # Значимость мотивов относительно графов с теми же степенями; перепись графа уже посчитана
+        significance = None
+        if null_samples > 0:
+            src, dst, n = graph_to_arrays(G)
+            significance = motif_significance(src, dst, n, samples=null_samples, seed=seed, observed=counts)
+
+        # Сохраняем перепись для повторного использования при экспорте
+        key = graph_hash(graph_data)
+        result_cache.put(('census', key), counts)
+        if significance is not None:
+            result_cache.put(('significance', key), significance)
+        top_nodes = None
+        if participation:
+            index = ParticipationIndex(structure.participation, [labels[node] for node in G.nodes()])
+            participation_cache.put(key, index)
+            top_nodes = index.top_nodes(top_k)
 
         # Собираем информацию о мотивах
         motifs_info = []
         for motif in structure.motif_subgraphs.values():
-            motifs_info.append({
+            info = {
                 'id': motif.index,
-                'count': motif.count,
+                'count': motif.count,  # число отображений мотива (триады x автоморфизмы), как в dotmotif
+                'triads': int(motif.count // MOTIF_AUTOMORPHISMS[motif.index]),
                 'probability': motif.probability
-            })
+            }
+            if significance is not None:
+                z_score = significance['z_scores'][motif.index]
+                info['null_mean'] = float(significance['null_mean'][motif.index])
+                info['null_std'] = float(significance['null_std'][motif.index])
+                info['z_score'] = None if np.isnan(z_score) else float(z_score)
+                info['p_value'] = float(significance['p_values'][motif.index])
+            if top_nodes is not None:
+                info['top_nodes'] = top_nodes[motif.index]
+            motifs_info.append(info)
 
         return jsonify({
             'success': True,
             'motifs': motifs_info,
-            'total_motifs': structure.motifs_sum
+            'total_motifs': structure.motifs_sum,
+            'null_samples': null_samples,
+            'graph_hash': key,
+            'participation_unit': 'triads' if participation else None,
+            'cost': plan
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/participation', methods=['POST'])
+def motif_participation():
+    """Участие вершин в мотиве: страница вершин по убыванию участия, CSV или архив NumPy всей матрицы"""
+    data = request.json
+    graph_data = data.get('graph')
+    key = data.get('graph_hash') or (graph_hash(graph_data) if graph_data else None)
+    format_type = data.get('format', 'json')
+    motif = int(data.get('motif', 0))
+    offset = max(0, int(data.get('offset', 0)))
+    limit = min(max(1, int(data.get('limit', DEFAULT_PAGE_SIZE))), MAX_PAGE_SIZE)
+
+    if key is None:
+        return jsonify({'error': 'No graph data provided'}), 400
+    if format_type not in ('json', 'csv', 'npz'):
+        return jsonify({'error': 'Unsupported format'}), 400
+    if not 0 <= motif < 16:
+        return jsonify({'error': 'Motif must be in 0..15'}), 400
+
+    try:
+        index = participation_cache.get(key)
+        if index is None:
+            if not graph_data:
+                return jsonify({'error': f'Graph {key} is not cached, send its data'}), 400
+            G, labels = intern_graph_json(graph_data)
+            plan = plan_analysis(graph_profile(G), request_limits(), 0, participation=True)
+            if not plan['admitted']:
+                return jsonify({'error': plan['reason'], 'cost': plan}), 413
+            counts, matrix = triad_census(*graph_to_arrays(G), participation=True)
+            index = ParticipationIndex(matrix, [labels[node] for node in G.nodes()])
+            participation_cache.put(key, index)
+
+        if format_type == 'csv':
+            return Response(
+                stream_with_context(index.iter_csv()),
+                mimetype='text/csv',
+                headers={'Content-Disposition': 'attachment; filename=participation.csv'}
+            )
+        if format_type == 'npz':
+            buffer = io.BytesIO()
+            index.to_npz(buffer)
+            buffer.seek(0)
+            return send_file(buffer, mimetype='application/octet-stream', as_attachment=True,
+                             download_name='participation.npz')
+
+        return jsonify({
+            'success': True,
+            'graph_hash': key,
+            'motif': motif,
+            'unit': 'triads',
+            'offset': offset,
+            'limit': limit,
+            'total_nodes': len(index),
+            'nodes': index.page(motif, offset, limit)
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/estimate', methods=['POST'])
+def estimate_request_cost():
+    """Оценка времени и памяти анализа и генерации без их выполнения"""
+    data = request.json
+    graph_data = data.get('graph')
+    null_samples = requested_null_samples(data)
+
+    if not graph_data:
+        return jsonify({'error': 'No graph data provided'}), 400
+
+    try:
+        G, labels = intern_graph_json(graph_data)
+        profile = graph_profile(G)
+
+        return jsonify({
+            'success': True,
+            'estimate': estimate_costs(profile, null_samples),
+            'limits': request_limits(),
+            'analysis': plan_analysis(profile, request_limits(), null_samples),
+            'generation': plan_generation(profile, request_limits())
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/export', methods=['POST'])
+def export_report():
+    """Потоковый экспорт отчёта (перепись мотивов, метрики, статистики ансамбля) в xlsx или csv"""
+    data = request.json
+    items = data.get('graphs') or ([{'name': 'graph', 'graph': data['graph']}] if data.get('graph') else [])
+    format_type = data.get('format', 'xlsx')
+    table = data.get('table', 'census')
+    ensemble = bool(data.get('ensemble', False))
+
+    if not items:
+        return jsonify({'error': 'No graph data provided'}), 400
+    if not isinstance(items, list):
+        return jsonify({'error': 'graphs must be a list'}), 400
+    if format_type not in ('xlsx', 'csv'):
+        return jsonify({'error': 'Unsupported format'}), 400
+    if format_type == 'csv' and table not in ('census', 'metrics', 'ensemble'):
+        return jsonify({'error': 'Unsupported table'}), 400
+    # Закэшированные результаты берутся сразу: их вытеснение из LRU во время выдачи отчёта ничего не ломает
+    cached = []
+    for position, item in enumerate(items):
+        # Некорректный граф отклоняется до начала выдачи, а не обрывает поток
+        try:
+            graph_data = item.get('graph')
+            if graph_data and not (isinstance(graph_data.get('nodes'), list)
+                                   and isinstance(graph_data.get('edges'), list)):
+                raise KeyError('nodes and edges')
+            key = item.get('graph_hash') or (graph_hash(graph_data) if graph_data else None)
+        except (AttributeError, KeyError, TypeError):
+            return jsonify({'error': f'Invalid graph data in item {position}'}), 400
+        if key is None:
+            return jsonify({'error': f'No graph data in item {position}'}), 400
+        counts = result_cache.get(('census', key))
+        if counts is None and not item.get('graph'):
+            return jsonify({'error': f"Graph {key} is not cached, send its data"}), 400
+        cached.append((key, counts, result_cache.get(('significance', key)),
+                       item.get('metrics') or result_cache.get(('metrics', key))))
+
+    def resolve_items():
+        # Переписи берутся из кэша; недостающие считаются по одному графу за раз
+        for item, (key, counts, significance, metrics) in zip(items, cached):
+            name = item.get('name') or key[:12]
+            if (counts is None or metrics is None) and item.get('graph'):
+                G, _ = intern_graph_json(item['graph'])
+                if counts is None:
+                    counts = triad_census(*graph_to_arrays(G)).tolist()
+                    result_cache.put(('census', key), counts)
+                if metrics is None:
+                    metrics = calculate_graph_metrics(G)
+                    result_cache.put(('metrics', key), metrics)
+            yield name, counts, significance, metrics
+
+    if format_type == 'csv':
+        return Response(
+            stream_with_context(iter_csv(report_rows(resolve_items(), ensemble), table)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename=report_{table}.csv'}
+        )
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
+    filepath = temp_file.name
+    temp_file.close()
+    try:
+        write_xlsx(report_rows(resolve_items(), ensemble), filepath, ensemble)
+    except Exception as e:
+        os.remove(filepath)
+        return jsonify({'error': str(e)}), 500
+
+    def stream_file():
+        try:
+            with open(filepath, 'rb') as f:
+                while True:
+                    chunk = f.read(64 * 1024)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(filepath)
+
+    return Response(
+        stream_file(),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers={'Content-Disposition': 'attachment; filename=report.xlsx'}
+    )
+
+
 @app.route('/api/download', methods=['POST'])
 def download_graph():
     """Скачивание графа в различных форматах"""
@@ -282,11 +545,7 @@ def download_graph():
 
     try:
         # Восстанавливаем граф
-        G = nx.DiGraph()
-        for node in graph_data['nodes']:
-            G.add_node(node['id'])
-        for edge in graph_data['edges']:
-            G.add_edge(edge['source'], edge['target'])
+        G, labels = intern_graph_json(graph_data)
 
         # Создаем временный файл
         temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=f'.{format_type}')
@@ -296,13 +555,13 @@ def download_graph():
         if format_type == 'txt':
             with open(filepath, 'w') as f:
                 for edge in G.edges():
-                    f.write(f"{edge[0]} {edge[1]}\n")
+                    f.write(f"{labels[edge[0]]} {labels[edge[1]]}\n")
         elif format_type == 'gml':
-            nx.write_gml(G, filepath)
+            nx.write_gml(nx.relabel_nodes(G, labels.as_mapping()), filepath)
         elif format_type == 'gexf':
-            nx.write_gexf(G, filepath)
+            nx.write_gexf(nx.relabel_nodes(G, labels.as_mapping()), filepath)
         elif format_type == 'graphml':
-            nx.write_graphml(G, filepath)
+            nx.write_graphml(nx.relabel_nodes(G, labels.as_mapping()), filepath)
         else:
             return jsonify({'error': 'Unsupported format'}), 400
 
@@ -368,12 +627,13 @@ def get_sample_data():
 
         for source, target in trade_routes:
             G.add_edge(source, target)
+        G, labels = intern_graph(G)
 
         # Рассчитываем метрики
         metrics = calculate_graph_metrics(G)
 
         # Конвертируем граф в JSON
-        graph_json = graph_to_json(G)
+        graph_json = graph_to_json(G, labels)
 
         return jsonify({
             'success': True,
@@ -408,4 +668,5 @@ if __name__ == '__main__':
         print(f"Warning: Static folder {app.static_folder} not found!")
         print("Make sure frontend files are in the correct location.")
 
-    socketio.run(app, debug=True, port=5000, allow_unsafe_werkzeug=True)
\ No newline at end of file
+    port = int(os.environ.get('PORT', 5000))
+    socketio.run(app, debug=True, port=port, allow_unsafe_werkzeug=True)
\ No newline at end of file
@@ -0,0 +1,51 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def graph_hash(graph_data):
+    """Считает хэш графа в JSON формате, не зависящий от порядка вершин и рёбер"""
+    nodes = sorted(str(node['id']) for node in graph_data['nodes'])
+    edges = sorted((str(edge['source']), str(edge['target'])) for edge in graph_data['edges'])
+    payload = json.dumps([nodes, edges], separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Потокобезопасный LRU-кэш результатов анализа графов.
+
+    При заданном max_bytes ограничен и суммарным размером значений (атрибут nbytes);
+    значение крупнее max_bytes не сохраняется.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        size = getattr(value, 'nbytes', 0)
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._bytes -= getattr(self._entries.pop(key), 'nbytes', 0)
+            self._entries[key] = value
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._bytes -= getattr(self._entries.popitem(last=False)[1], 'nbytes', 0)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
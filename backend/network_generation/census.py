@@ -0,0 +1,215 @@
+import numpy as np
+import networkx as nx
+from .triplets import motifs_digraphs
+
+# Число автоморфизмов мотивов M0..M15. dotmotif возвращает все отображения мотива
+# в граф, поэтому счётчики SubgraphStructure равны числу триад, умноженному на это число
+MOTIF_AUTOMORPHISMS = np.array([6, 1, 2, 2, 1, 2, 1, 1, 2, 3, 1, 2, 2, 1, 1, 6], dtype=np.int64)
+
+# Вид связи со стороны центральной вершины: исходящая, входящая, взаимная
+_OUT, _IN, _MUT = 0, 1, 2
+
+# Мотив незамкнутой триады по видам двух связей центральной вершины
+_PAIR_MOTIF = np.array([
+    [3, 4, 6],  # out + out / in / mut
+    [4, 5, 7],  # in + out / in / mut
+    [6, 7, 8],  # mut + out / in / mut
+], dtype=np.int64)
+
+
+def _build_code_table():
+    """Строит таблицу: 6-битный код триады (a < b < c) -> индекс мотива"""
+    table = np.zeros(64, dtype=np.int64)
+    pairs = [(0, 1), (1, 0), (1, 2), (2, 1), (0, 2), (2, 0)]
+    for code in range(64):
+        triad = nx.DiGraph()
+        triad.add_nodes_from(range(3))
+        triad.add_edges_from(pair for bit, pair in enumerate(pairs) if code >> bit & 1)
+        table[code] = [i for i in range(16) if nx.is_isomorphic(motifs_digraphs[i], triad)][0]
+    return table
+
+
+_CODE_MOTIF = _build_code_table()
+
+
+def graph_to_arrays(G):
+    """Переводит граф NetworkX в целочисленные массивы рёбер (петли отбрасываются)"""
+    index = {node: i for i, node in enumerate(G.nodes())}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges() if u != v], dtype=np.int64)
+    edges = edges.reshape(-1, 2)
+    return edges[:, 0], edges[:, 1], len(index)
+
+
+def _links(src, dst, n):
+    """Сводит рёбра к неориентированным связям (lo, hi) с типом 1: lo->hi, 2: hi->lo, 3: взаимная"""
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+    uniq_edges = np.unique(src * n + dst)
+    src, dst = uniq_edges // n, uniq_edges % n
+
+    lo = np.minimum(src, dst)
+    hi = np.maximum(src, dst)
+    keys = lo * n + hi
+    bits = np.where(src < dst, 1, 2)
+    order = np.argsort(keys, kind='stable')
+    keys, bits = keys[order], bits[order]
+    link_keys, start = np.unique(keys, return_index=True)
+    if len(link_keys) == 0:
+        return link_keys, np.zeros(0, dtype=np.int64)
+    link_types = np.bitwise_or.reduceat(bits, start)
+    return link_keys, link_types
+
+
+def _views(link_types):
+    """Вид связи со стороны вершин lo и hi"""
+    lo_view = np.select([link_types == 1, link_types == 2], [_OUT, _IN], _MUT)
+    hi_view = np.select([link_types == 1, link_types == 2], [_IN, _OUT], _MUT)
+    return lo_view, hi_view
+
+
+def _triangles(link_lo, link_hi, degree, n):
+    """Перечисляет треугольники неориентированного графа связей, каждый ровно один раз"""
+    # ориентируем связи от вершины меньшего ранга (степень, номер) к большему
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), degree))] = np.arange(n)
+    swap = rank[link_lo] > rank[link_hi]
+    u = np.where(swap, link_hi, link_lo)
+    v = np.where(swap, link_lo, link_hi)
+
+    order = np.argsort(u, kind='stable')
+    u, v = u[order], v[order]
+    bounds = np.searchsorted(u, np.arange(n + 1))
+    forward = [set(v[bounds[x]:bounds[x + 1]].tolist()) for x in range(n)]
+
+    tri_a, tri_b, tri_c = [], [], []
+    for x, y in zip(u.tolist(), v.tolist()):
+        common = forward[x] & forward[y]
+        if common:
+            tri_a.extend([x] * len(common))
+            tri_b.extend([y] * len(common))
+            tri_c.extend(common)
+    triangles = np.array([tri_a, tri_b, tri_c], dtype=np.int64).T.reshape(-1, 3)
+    return np.sort(triangles, axis=1)
+
+
+def triad_census(src, dst, n, weighted=True, participation=False):
+    """Считает 16 классов триад по массивам рёбер за O(m^1.5) без перебора всех троек.
+
+    При weighted=True счётчики домножаются на число автоморфизмов мотива и
+    совпадают со счётчиками dotmotif в SubgraphStructure. При participation=True
+    возвращает (counts, matrix), где matrix[v, k] — число триад класса k,
+    содержащих вершину v (без домножения на автоморфизмы).
+    """
+    counts = np.zeros(16, dtype=np.int64)
+    if n < 3:
+        return (counts, np.zeros((n, 16), dtype=np.int64)) if participation else counts
+
+    link_keys, link_types = _links(src, dst, n)
+    link_lo, link_hi = link_keys // n, link_keys % n
+    lo_view, hi_view = _views(link_types)
+
+    # число связей каждого вида у каждой вершины
+    views = np.zeros((n, 3), dtype=np.int64)
+    np.add.at(views, (link_lo, lo_view), 1)
+    np.add.at(views, (link_hi, hi_view), 1)
+    degree = views.sum(axis=1)
+    n_out, n_in, n_mut = views[:, _OUT], views[:, _IN], views[:, _MUT]
+
+    triangles = _triangles(link_lo, link_hi, degree, n)
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    ab = np.searchsorted(link_keys, a * n + b)
+    bc = np.searchsorted(link_keys, b * n + c)
+    ac = np.searchsorted(link_keys, a * n + c)
+
+    # замкнутые триады (M9..M15)
+    codes = link_types[ab] | link_types[bc] << 2 | link_types[ac] << 4
+    counts += np.bincount(_CODE_MOTIF[codes], minlength=16)
+
+    # незамкнутые триады: все пары связей у центра минус пары, замкнутые в треугольник
+    pair_counts = np.zeros(16, dtype=np.int64)
+    pair_counts[3] = (n_out * (n_out - 1) // 2).sum()
+    pair_counts[5] = (n_in * (n_in - 1) // 2).sum()
+    pair_counts[8] = (n_mut * (n_mut - 1) // 2).sum()
+    pair_counts[4] = (n_out * n_in).sum()
+    pair_counts[6] = (n_mut * n_out).sum()
+    pair_counts[7] = (n_mut * n_in).sum()
+    closed_pairs = np.concatenate([
+        _PAIR_MOTIF[lo_view[ab], lo_view[ac]],  # центр a
+        _PAIR_MOTIF[hi_view[ab], lo_view[bc]],  # центр b
+        _PAIR_MOTIF[hi_view[ac], hi_view[bc]],  # центр c
+    ])
+    counts += pair_counts - np.bincount(closed_pairs, minlength=16)
+
+    # триады с единственной связью: третья вершина не смежна ни с одним из концов
+    link_triangles = np.bincount(np.concatenate([ab, bc, ac]), minlength=len(link_keys))
+    isolated = n - degree[link_lo] - degree[link_hi] + link_triangles
+    counts[1] = isolated[link_types != 3].sum()
+    counts[2] = isolated[link_types == 3].sum()
+
+    counts[0] = n * (n - 1) * (n - 2) // 6 - counts[1:].sum()
+
+    if participation:
+        matrix = _participation(n, link_lo, link_hi, link_types, lo_view, hi_view, views,
+                                triangles, ab, bc, ac, codes, closed_pairs, isolated)
+
+    if weighted:
+        counts *= MOTIF_AUTOMORPHISMS
+    return (counts, matrix) if participation else counts
+
+
+def _participation(n, link_lo, link_hi, link_types, lo_view, hi_view, views,
+                   triangles, ab, bc, ac, codes, closed_pairs, isolated):
+    """Матрица участия вершин в триадах по промежуточным массивам triad_census"""
+    matrix = np.zeros((n, 16), dtype=np.int64)
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    n_out, n_in, n_mut = views[:, _OUT], views[:, _IN], views[:, _MUT]
+
+    # замкнутые триады: все три вершины треугольника
+    closed = _CODE_MOTIF[codes]
+    for vertex in (a, b, c):
+        np.add.at(matrix, (vertex, closed), 1)
+
+    # незамкнутые триады: центр с двумя связями ...
+    matrix[:, 3] += n_out * (n_out - 1) // 2
+    matrix[:, 5] += n_in * (n_in - 1) // 2
+    matrix[:, 8] += n_mut * (n_mut - 1) // 2
+    matrix[:, 4] += n_out * n_in
+    matrix[:, 6] += n_mut * n_out
+    matrix[:, 7] += n_mut * n_in
+    # ... и концы: связь x-y образует пару с каждой другой связью x
+    for x, y, x_view in ((link_lo, link_hi, lo_view), (link_hi, link_lo, hi_view)):
+        for view in (_OUT, _IN, _MUT):
+            np.add.at(matrix, (y, _PAIR_MOTIF[x_view, view]), views[x, view] - (x_view == view))
+    # пары, замкнутые в треугольник, учтены выше у всех трёх вершин
+    for centre_pairs in closed_pairs.reshape(3, -1):
+        for vertex in (a, b, c):
+            np.add.at(matrix, (vertex, centre_pairs), -1)
+
+    # триады с единственной связью: её концы ...
+    single_motif = np.where(link_types != 3, 1, 2)
+    for end in (link_lo, link_hi):
+        np.add.at(matrix, (end, single_motif), isolated)
+    # ... и третья вершина w: связи, не касающиеся ни w, ни её соседей
+    for motif in (1, 2):
+        mask = single_motif == motif
+        degree = np.bincount(link_lo[mask], minlength=n) + np.bincount(link_hi[mask], minlength=n)
+        touching = np.zeros(n, dtype=np.int64)
+        np.add.at(touching, link_lo, degree[link_hi])
+        np.add.at(touching, link_hi, degree[link_lo])
+        # связь между двумя соседями w учтена дважды
+        for vertex, opposite in ((a, bc), (b, ac), (c, ab)):
+            np.add.at(touching, vertex, -mask[opposite].astype(np.int64))
+        matrix[:, motif] += mask.sum() - touching
+
+    matrix[:, 0] = (n - 1) * (n - 2) // 2 - matrix[:, 1:].sum(axis=1)
+    return matrix
+
+
+def motif_distance(counts, target_probabilities):
+    """Расстояние полной вариации между распределением мотивов и целевым распределением"""
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    probabilities = counts / total if total > 0 else counts
+    return float(0.5 * np.abs(probabilities - np.asarray(target_probabilities, dtype=np.float64)).sum())
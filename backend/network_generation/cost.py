@@ -0,0 +1,157 @@
+import numpy as np
+
+# Коэффициенты модели стоимости (секунды и байты), откалиброваны на случайных графах.
+# Это порядок величины, а не точный прогноз: их достаточно, чтобы отсечь патологические входы
+COST_COEFFICIENTS = {
+    # dotmotif: перебор всех отображений мотивов, в том числе в дополнении графа, ~ N^3
+    'dotmotif_seconds_per_triple': 3e-5,
+    'dotmotif_bytes_per_triple': 150,
+    'dotmotif_bytes_per_pair': 300,  # дополнение графа nx.complete_graph - graph
+    # numpy: проход по связям и перечисление треугольников
+    'numpy_seconds_per_edge': 4.5e-6,
+    'numpy_seconds_per_wedge': 5e-8,
+    'numpy_bytes_per_edge': 350,
+    'numpy_bytes_per_node': 1800,
+    'participation_bytes_per_node': 16 * 8,  # матрица участия вершин n x 16 int64
+    # генерация: итерации wegner_multiplet_model, на разреженных графах доходящие до предела M * 100
+    'generation_iterations_per_edge': 100,
+    'generation_seconds_per_iteration': 3.5e-4,
+    'batched_generation_seconds_per_iteration': 1e-6,  # пакетное размещение троек (batch_size)
+    'generation_bytes_per_edge': 600,
+    # нуль-модель: пакетные обмены рёбер на один нуль-граф
+    'swap_seconds_per_edge': 2.5e-6,
+    'graph_bytes_per_edge': 400,
+}
+
+CENSUS_ENGINES = ('dotmotif', 'numpy')
+
+
+def graph_profile(G):
+    """Размер и распределение степеней графа, по которым оценивается стоимость"""
+    degrees = np.fromiter((d for _, d in G.degree()), dtype=np.float64, count=G.number_of_nodes())
+    return {
+        'num_nodes': G.number_of_nodes(),
+        'num_edges': G.number_of_edges(),
+        'max_degree': int(degrees.max()) if len(degrees) else 0,
+        'wedges': float((degrees * (degrees - 1) / 2).sum())
+    }
+
+
+def estimate_census(profile, engine, participation=False):
+    """Оценивает время (с) и пиковую память (байты) переписи мотивов выбранным движком"""
+    c = COST_COEFFICIENTS
+    n, m = profile['num_nodes'], profile['num_edges']
+    if participation:
+        # матрица участия считается только движком numpy
+        census = estimate_census(profile, 'numpy')
+        census['memory_bytes'] += c['participation_bytes_per_node'] * n
+        return census
+    if engine == 'dotmotif':
+        triples = float(n) ** 3
+        return {
+            'seconds': c['dotmotif_seconds_per_triple'] * triples,
+            'memory_bytes': c['dotmotif_bytes_per_triple'] * triples + c['dotmotif_bytes_per_pair'] * float(n) ** 2
+        }
+    return {
+        'seconds': c['numpy_seconds_per_edge'] * m + c['numpy_seconds_per_wedge'] * profile['wedges'],
+        'memory_bytes': c['numpy_bytes_per_edge'] * m + c['numpy_bytes_per_node'] * n
+    }
+
+
+def estimate_generation(profile, engine, batch_size=None):
+    """Оценивает генерацию: перепись образца выбранным движком и цикл добавления рёбер"""
+    c = COST_COEFFICIENTS
+    m = profile['num_edges']
+    census = estimate_census(profile, engine)
+    iterations = c['generation_iterations_per_edge'] * m
+    per_iteration = c['batched_generation_seconds_per_iteration' if batch_size else 'generation_seconds_per_iteration']
+    return {
+        'seconds': census['seconds'] + per_iteration * iterations,
+        'memory_bytes': census['memory_bytes'] + c['generation_bytes_per_edge'] * m,
+        'census_seconds': census['seconds']
+    }
+
+
+def estimate_null_model(profile, samples, swaps_per_edge=10):
+    """Оценивает построение и перепись samples нуль-графов"""
+    c = COST_COEFFICIENTS
+    m = profile['num_edges']
+    census = estimate_census(profile, 'numpy')
+    per_sample = c['swap_seconds_per_edge'] * swaps_per_edge * m + census['seconds']
+    return {
+        'seconds': per_sample * samples,
+        'seconds_per_sample': per_sample,
+        'memory_bytes': census['memory_bytes'] + c['graph_bytes_per_edge'] * m
+    }
+
+
+def estimate_costs(profile, null_samples=0):
+    """Сводная оценка стоимости анализа и генерации для всех движков"""
+    return {
+        'profile': profile,
+        'census': {engine: estimate_census(profile, engine) for engine in CENSUS_ENGINES},
+        'generation': {engine: estimate_generation(profile, engine) for engine in CENSUS_ENGINES},
+        'null_model': estimate_null_model(profile, null_samples)
+    }
+
+
+def _fits(estimate, limits):
+    return estimate['seconds'] <= limits['seconds'] and estimate['memory_bytes'] <= limits['memory_bytes']
+
+
+def _cheapest_engine(profile, limits, participation=False):
+    """Движок переписи с наименьшим оценочным временем среди укладывающихся в лимиты, или None"""
+    engines = ('numpy',) if participation else CENSUS_ENGINES
+    estimates = {engine: estimate_census(profile, engine, participation) for engine in engines}
+    fitting = [engine for engine in engines if _fits(estimates[engine], limits)]
+    return min(fitting, key=lambda engine: estimates[engine]['seconds'], default=None)
+
+
+def plan_analysis(profile, limits, null_samples, participation=False):
+    """Выбирает движок переписи и число нуль-графов так, чтобы уложиться в лимиты.
+
+    Возвращает план с полями admitted, mode ('exact', 'approximate' или 'rejected'),
+    engine, null_samples и оценкой стоимости. С participation учитывается матрица участия вершин.
+    """
+    plan = {'admitted': True, 'mode': 'exact', 'engine': _cheapest_engine(profile, limits, participation),
+            'null_samples': null_samples, 'estimate': estimate_costs(profile, null_samples), 'reason': None}
+    if participation:
+        plan['estimate']['participation'] = estimate_census(profile, 'numpy', participation=True)
+    if plan['engine'] is None:
+        plan.update(admitted=False, mode='rejected',
+                    reason='Motif census exceeds the request limits; use the batch CLI')
+        return plan
+
+    census_seconds = estimate_census(profile, plan['engine'], participation)['seconds']
+    null_model = estimate_null_model(profile, null_samples)
+    if null_samples and (census_seconds + null_model['seconds'] > limits['seconds']
+                         or null_model['memory_bytes'] > limits['memory_bytes']):
+        affordable = 0
+        if null_model['memory_bytes'] <= limits['memory_bytes']:
+            affordable = int((limits['seconds'] - census_seconds) // null_model['seconds_per_sample'])
+        plan.update(mode='approximate', null_samples=max(0, min(null_samples, affordable)),
+                    reason='Null-model samples reduced to fit the time limit')
+    return plan
+
+
+def plan_generation(profile, limits, time_budget=None, batch_size=None):
+    """Выбирает движок переписи и бюджет времени генерации так, чтобы уложиться в лимиты"""
+    plan = {'admitted': True, 'mode': 'exact', 'engine': _cheapest_engine(profile, limits),
+            'time_budget': time_budget, 'estimate': estimate_costs(profile), 'reason': None}
+    if plan['engine'] is None:
+        plan.update(admitted=False, mode='rejected',
+                    reason='Motif census exceeds the request limits; use the batch CLI')
+        return plan
+
+    generation = estimate_generation(profile, plan['engine'], batch_size)
+    if generation['memory_bytes'] > limits['memory_bytes']:
+        plan.update(admitted=False, mode='rejected',
+                    reason='Generation exceeds the memory limit; use the batch CLI')
+        return plan
+    # лимит соблюдается бюджетом времени, а не только прогнозом
+    remaining = limits['seconds'] - generation['census_seconds']
+    plan['time_budget'] = remaining if time_budget is None else min(time_budget, remaining)
+    if generation['seconds'] > limits['seconds']:
+        # генерация с бюджетом вернёт частично построенный граф
+        plan.update(mode='approximate', reason='Generation time budget capped by the time limit')
+    return plan
@@ -0,0 +1,333 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from .singleflight import SingleFlight
+from .triplet_model import RandomGraphGenerator
+from .triplets import motifs
+from .utils import graph_to_json
+
+# Сколько секунд хранить состояние сессии после завершения задачи
+SESSION_TTL = 5
+# Сколько секунд хранить разосланные события в общей очереди
+EVENT_TTL = 60
+# Сколько секунд хранить результаты завершённых задач
+JOB_TTL = 600
+# Через сколько секунд без отметки вычислительного процесса выполняющаяся задача считается потерянной
+JOB_LEASE = 30
+
+
+class LocalJobStore:
+    """Состояние задач и сессий в памяти одного процесса"""
+
+    shared = False
+
+    def __init__(self):
+        self.flights = SingleFlight()
+        self.sessions = {}
+
+    def join(self, key, payload, subscriber=None):
+        """Возвращает (job, leader); leader=True, если задачу нужно запустить"""
+        return self.flights.join(key, subscriber)
+
+    def update_progress(self, job, state):
+        return self.flights.update_progress(job, state)
+
+    def job_progress(self, job):
+        return job.progress
+
+    def finish(self, job, result=None, error=None):
+        return self.flights.finish(job, result=result, error=None if error is None else RuntimeError(error))
+
+    def wait(self, job, timeout=None):
+        return job.wait(timeout)
+
+    def session_state(self, session_id):
+        return self.sessions.get(session_id)
+
+    def set_session_state(self, session_id, state):
+        self.sessions[session_id] = state
+
+    def drop_sessions(self, session_ids):
+        for session_id in session_ids:
+            self.sessions.pop(session_id, None)
+
+
+class SQLiteJobStore:
+    """Состояние задач, подписчиков и сессий в общем файле SQLite.
+
+    Используется в многопроцессном режиме: веб-процессы ставят задачи в очередь,
+    вычислительные процессы забирают их методом claim().
+    """
+
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_key_status ON jobs (key, status);
+            CREATE TABLE IF NOT EXISTS subscribers (job_id INTEGER NOT NULL, session_id TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS subscribers_job ON subscribers (job_id);
+            CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, state TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+        """)
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _subscribers(self, db, job):
+        return [row[0] for row in db.execute('SELECT session_id FROM subscribers WHERE job_id = ?', (job,))]
+
+    def _expire_stale(self, db):
+        """Завершает с ошибкой задачи, процесс которых перестал продлевать аренду (упал или был убит)"""
+        now = time.time()
+        stale = [row[0] for row in db.execute("SELECT id FROM jobs WHERE status = 'running' AND updated < ?",
+                                              (now - JOB_LEASE,))]
+        for job in stale:
+            error = 'Compute worker stopped responding'
+            db.execute("UPDATE jobs SET status = 'error', error = ?, updated = ? WHERE id = ?", (error, now, job))
+            # подписанные сессии узнают об ошибке через общую очередь событий
+            session_ids = self._subscribers(db, job)
+            if session_ids:
+                db.execute('INSERT INTO events (event, data, created) VALUES (?, ?, ?)',
+                           ('generation_error', json.dumps({'session_ids': session_ids, 'error': error,
+                                                            'status': 'error'}), now))
+            db.execute('DELETE FROM subscribers WHERE job_id = ?', (job,))
+        return stale
+
+    def expire_stale(self):
+        with self._transaction() as db:
+            return self._expire_stale(db)
+
+    def heartbeat(self, job):
+        """Продлевает аренду выполняющейся задачи"""
+        with self._transaction() as db:
+            db.execute("UPDATE jobs SET updated = ? WHERE id = ? AND status = 'running'", (time.time(), job))
+
+    def join(self, key, payload, subscriber=None):
+        key = json.dumps(list(key))
+        with self._transaction() as db:
+            self._expire_stale(db)
+            row = db.execute("SELECT id FROM jobs WHERE key = ? AND status IN ('queued', 'running')",
+                             (key,)).fetchone()
+            leader = row is None
+            if leader:
+                job = db.execute("INSERT INTO jobs (key, status, payload, updated) VALUES (?, 'queued', ?, ?)",
+                                 (key, json.dumps(payload), time.time())).lastrowid
+            else:
+                job = row[0]
+            if subscriber is not None:
+                db.execute('INSERT INTO subscribers (job_id, session_id) VALUES (?, ?)', (job, subscriber))
+        return job, leader
+
+    def claim(self):
+        """Забирает самую старую задачу из очереди; возвращает (job, payload) или None"""
+        with self._transaction() as db:
+            self._expire_stale(db)
+            row = db.execute("SELECT id, payload FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ?", (time.time(), row[0]))
+        return row[0], json.loads(row[1])
+
+    def update_progress(self, job, state):
+        with self._transaction() as db:
+            db.execute('UPDATE jobs SET progress = ?, updated = ? WHERE id = ?', (json.dumps(state), time.time(), job))
+            return self._subscribers(db, job)
+
+    def job_progress(self, job):
+        row = self._connection().execute('SELECT progress FROM jobs WHERE id = ?', (job,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def finish(self, job, result=None, error=None):
+        """Завершает выполняющуюся задачу; задача, уже признанная потерянной, остаётся с ошибкой"""
+        with self._transaction() as db:
+            db.execute("UPDATE jobs SET status = ?, result = ?, error = ?, updated = ? "
+                       "WHERE id = ? AND status = 'running'",
+                       ('error' if error is not None else 'complete',
+                        json.dumps(result) if result is not None else None, error, time.time(), job))
+            subscribers = self._subscribers(db, job)
+            db.execute('DELETE FROM subscribers WHERE job_id = ?', (job,))
+            db.execute("DELETE FROM jobs WHERE status IN ('complete', 'error') AND updated < ?",
+                       (time.time() - JOB_TTL,))
+            return subscribers
+
+    def wait(self, job, timeout=None, poll_interval=0.1):
+        """Ждёт завершения задачи, которую выполняет другой процесс"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            status, result, error = self._connection().execute(
+                'SELECT status, result, error FROM jobs WHERE id = ?', (job,)).fetchone()
+            if status == 'complete':
+                return json.loads(result)
+            if status == 'error':
+                raise RuntimeError(error)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f'Job {job} is still {status}')
+            time.sleep(poll_interval)
+
+    def session_state(self, session_id):
+        row = self._connection().execute('SELECT state FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_session_state(self, session_id, state):
+        with self._transaction() as db:
+            db.execute('INSERT OR REPLACE INTO sessions (session_id, state) VALUES (?, ?)',
+                       (session_id, json.dumps(state)))
+
+    def drop_sessions(self, session_ids):
+        with self._transaction() as db:
+            db.executemany('DELETE FROM sessions WHERE session_id = ?', [(s,) for s in session_ids])
+
+
+class LocalEventBus:
+    """Рассылает события socket.io напрямую из текущего процесса"""
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+
+    def publish(self, event, data, session_ids):
+        """Отправляет событие один раз в комнаты сессий session_ids"""
+        if session_ids:
+            self.socketio.emit(event, dict(data, session_ids=list(session_ids)), to=list(session_ids))
+
+
+class SQLiteEventBus:
+    """Очередь событий socket.io в общем файле SQLite.
+
+    Вычислительные процессы публикуют события, каждый веб-процесс пересылает
+    их своим клиентам фоновым потоком pump().
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def publish(self, event, data, session_ids):
+        """Ставит событие в очередь одной записью на все сессии session_ids"""
+        if not session_ids:
+            return
+        now = time.time()
+        data = dict(data, session_ids=list(session_ids))
+        with self.store._transaction() as db:
+            db.execute('INSERT INTO events (event, data, created) VALUES (?, ?, ?)', (event, json.dumps(data), now))
+            db.execute('DELETE FROM events WHERE created < ?', (now - EVENT_TTL,))
+
+    def pump(self, socketio, poll_interval=0.05, expire_interval=5):
+        """Запускает поток, пересылающий новые события клиентам этого процесса
+        и периодически завершающий потерянные задачи"""
+        def run():
+            db = self.store._connection()
+            last_id = db.execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+            next_expire = time.monotonic()
+            while True:
+                if time.monotonic() >= next_expire:
+                    self.store.expire_stale()
+                    next_expire = time.monotonic() + expire_interval
+                rows = db.execute('SELECT id, event, data FROM events WHERE id > ? ORDER BY id',
+                                  (last_id,)).fetchall()
+                for event_id, event, data in rows:
+                    data = json.loads(data)
+                    socketio.emit(event, data, to=data['session_ids'])
+                    last_id = event_id
+                time.sleep(poll_interval)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+
+def execute_generation(store, bus, job, G, labels, budget, seed, engine='dotmotif'):
+    """Выполняет генерацию графа G на номерах вершин (метки labels), рассылая прогресс и результат
+    всем сессиям, подписанным на задачу"""
+    subscribers = []
+    try:
+        # Создаем генератор с callback для прогресса
+        generator = RandomGraphGenerator(G, motifs, engine)
+        last_progress = [-1]
+
+        def progress_callback(current, total):
+            progress = min(100, int((current / total) * 100))
+            # события рассылаются только при изменении процента
+            if progress == last_progress[0]:
+                return
+            last_progress[0] = progress
+            state = {
+                'progress': progress,
+                'current': current,
+                'total': total,
+                'metrics': generator.live_metrics.snapshot(),
+                'status': 'generating',
+                'emitted_at': time.time()
+            }
+            session_ids = store.update_progress(job, state)
+            for session_id in session_ids:
+                store.set_session_state(session_id, state)
+            # Отправляем обновление через WebSocket один раз всем подписанным сессиям
+            bus.publish('generation_progress', state, session_ids)
+            time.sleep(0.001)  # Небольшая задержка для UI
+
+        generator.set_progress_callback(progress_callback)
+
+        # Генерируем граф
+        new_G = generator.wegner_multiplet_model(seed=seed, **budget)
+
+        # Дополняем накопленные при генерации метрики глобальными
+        result = {
+            'metrics': generator.live_metrics.finalize(new_G),
+            'graph': graph_to_json(new_G, labels),
+            'generation': generator.generation_report
+        }
+        subscribers = store.finish(job, result=result)
+
+        # Отправляем финальный результат: граф сериализуется один раз на все сессии
+        for session_id in subscribers:
+            store.set_session_state(session_id, dict(store.session_state(session_id) or {}, status='complete'))
+        bus.publish('generation_complete', dict(result, success=True, status='complete'), subscribers)
+
+    except Exception as e:
+        subscribers = store.finish(job, error=str(e))
+        for session_id in subscribers:
+            store.set_session_state(session_id, dict(store.session_state(session_id) or {}, status='error'))
+        bus.publish('generation_error', {
+            'error': str(e),
+            'status': 'error'
+        }, subscribers)
+    finally:
+        # Не удаляем сразу, чтобы фронтенд мог получить последнее состояние
+        timer = threading.Timer(SESSION_TTL, store.drop_sessions, args=(subscribers,))
+        timer.daemon = True
+        timer.start()
@@ -0,0 +1,55 @@
+import numpy as np
+import networkx as nx
+
+
+class LabelTable:
+    """Обратимое отображение меток вершин в плотные целые номера 0..N-1"""
+
+    def __init__(self, labels=()):
+        self.labels = []
+        self._ids = {}
+        for label in labels:
+            self.intern(label)
+
+    def intern(self, label):
+        """Возвращает номер метки, присваивая новый при первом появлении"""
+        node_id = self._ids.get(label)
+        if node_id is None:
+            node_id = len(self.labels)
+            self._ids[label] = node_id
+            self.labels.append(label)
+        return node_id
+
+    def __getitem__(self, node_id):
+        return self.labels[node_id]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def as_mapping(self):
+        """Словарь номер -> метка для nx.relabel_nodes"""
+        return dict(enumerate(self.labels))
+
+
+def _graph_from_arrays(num_nodes, src, dst):
+    G = nx.DiGraph()
+    G.add_nodes_from(range(num_nodes))
+    G.add_edges_from(zip(src.tolist(), dst.tolist()))
+    return G
+
+
+def intern_graph_json(graph_data):
+    """Единый шаг приёма графа из JSON: метки переводятся в номера int32, граф строится на номерах"""
+    labels = LabelTable(node['id'] for node in graph_data['nodes'])
+    edges = graph_data['edges']
+    src = np.fromiter((labels.intern(edge['source']) for edge in edges), dtype=np.int32, count=len(edges))
+    dst = np.fromiter((labels.intern(edge['target']) for edge in edges), dtype=np.int32, count=len(edges))
+    return _graph_from_arrays(len(labels), src, dst), labels
+
+
+def intern_graph(G):
+    """Переводит граф NetworkX с произвольными метками в граф на номерах 0..N-1"""
+    labels = LabelTable(G.nodes())
+    src = np.fromiter((labels.intern(u) for u, v in G.edges()), dtype=np.int32, count=G.number_of_edges())
+    dst = np.fromiter((labels.intern(v) for u, v in G.edges()), dtype=np.int32, count=G.number_of_edges())
+    return _graph_from_arrays(len(labels), src, dst), labels
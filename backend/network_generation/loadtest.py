@@ -0,0 +1,286 @@
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+import networkx as nx
+import numpy as np
+import requests
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_graph(nodes, edges, seed):
+    """Случайный ориентированный граф в JSON формате API"""
+    G = nx.gnm_random_graph(nodes, edges, seed=seed, directed=True)
+    return {
+        'nodes': [{'id': f'v{node}'} for node in G.nodes()],
+        'edges': [{'source': f'v{u}', 'target': f'v{v}'} for u, v in G.edges()]
+    }
+
+
+def edgelist_text(graph):
+    return ''.join(f"{edge['source']} {edge['target']}\n" for edge in graph['edges'])
+
+
+class Recorder:
+    """Собирает задержки и ошибки по операциям"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.latencies[name].append(seconds)
+
+    def error(self, name):
+        with self.lock:
+            self.errors[name] += 1
+
+    def report(self, duration):
+        lines = [f"{'operation':<22}{'count':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = np.array(self.latencies.get(name, [])) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (np.nan,) * 3
+            lines.append(f'{name:<22}{len(values):>7}{self.errors.get(name, 0):>8}{len(values) / duration:>9.2f}'
+                         f'{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}')
+        return '\n'.join(lines)
+
+
+class ProcessSampler:
+    """Периодически измеряет CPU и RSS дерева процессов сервера по /proc (только Linux)"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu = []
+        self.rss = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _tree(self):
+        children = defaultdict(list)
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat') as f:
+                        fields = f.read().rsplit(')', 1)[1].split()
+                    children[int(fields[1])].append(int(entry))
+                except OSError:
+                    pass
+        tree, stack = [], [self.pid]
+        while stack:
+            pid = stack.pop()
+            tree.append(pid)
+            stack.extend(children.get(pid, []))
+        return tree
+
+    def _cpu_seconds_and_rss(self):
+        cpu, rss = 0.0, 0
+        for pid in self._tree():
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+                rss += int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+            except OSError:
+                pass
+        return cpu, rss
+
+    def _run(self):
+        last_cpu, last_time = self._cpu_seconds_and_rss()[0], time.monotonic()
+        while not self._stop.wait(self.interval):
+            cpu, rss = self._cpu_seconds_and_rss()
+            now = time.monotonic()
+            self.cpu.append(100 * (cpu - last_cpu) / (now - last_time))
+            self.rss.append(rss)
+            last_cpu, last_time = cpu, now
+
+    def start(self):
+        if os.path.exists(f'/proc/{self.pid}'):
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def report(self):
+        if not self.cpu:
+            return 'server CPU/RSS: not available'
+        return (f'server CPU: avg {np.mean(self.cpu):.0f}%, max {np.max(self.cpu):.0f}% | '
+                f'RSS: max {np.max(self.rss) / 2 ** 20:.0f} MiB')
+
+
+class SimulatedClient(threading.Thread):
+    """Клиент с собственным соединением socket.io, выполняющий случайную смесь операций"""
+
+    def __init__(self, index, url, mix, graph, recorder, deadline, null_samples, generation_timeout):
+        super().__init__(daemon=True)
+        self.url = url
+        self.mix = mix
+        self.graph = graph
+        self.recorder = recorder
+        self.deadline = deadline
+        self.null_samples = null_samples
+        self.generation_timeout = generation_timeout
+        self.rng = random.Random(index)
+        self.http = requests.Session()
+        self.sio = socketio.Client(reconnection=False)
+        self.pending = {}
+        self.sio.on('generation_progress', self._on_progress)
+        self.sio.on('generation_complete', self._on_done)
+        self.sio.on('generation_error', self._on_done)
+
+    def _on_progress(self, data):
+        if any(s in self.pending for s in data.get('session_ids', [])) and 'emitted_at' in data:
+            self.recorder.record('progress_event_lag', time.time() - data['emitted_at'])
+
+    def _on_done(self, data):
+        for session_id in data.get('session_ids', []):
+            done = self.pending.get(session_id)
+            if done is not None:
+                done['error'] = data.get('error')
+                done['event'].set()
+
+    def _post(self, name, path, **kwargs):
+        started = time.monotonic()
+        try:
+            response = self.http.post(self.url + path, timeout=self.generation_timeout, **kwargs)
+            response.raise_for_status()
+        except requests.RequestException:
+            self.recorder.error(name)
+            return None
+        self.recorder.record(name, time.monotonic() - started)
+        return response.json()
+
+    def upload(self):
+        files = {'file': ('graph.txt', edgelist_text(self.graph))}
+        self._post('/api/upload', '/api/upload', files=files)
+
+    def analyze(self):
+        self._post('/api/analyze', '/api/analyze', json={'graph': self.graph, 'null_samples': self.null_samples})
+
+    def generate(self):
+        session_id = str(uuid.uuid4())
+        done = {'event': threading.Event(), 'error': None}
+        self.pending[session_id] = done
+        started = time.monotonic()
+        self.sio.call('subscribe', {'session_id': session_id})
+        body = {'original_graph': self.graph, 'session_id': session_id, 'seed': self.rng.randrange(2 ** 31)}
+        if self._post('/api/generate_stream', '/api/generate_stream', json=body) is not None:
+            if done['event'].wait(self.generation_timeout) and done['error'] is None:
+                self.recorder.record('generation_complete', time.monotonic() - started)
+            else:
+                self.recorder.error('generation_complete')
+        del self.pending[session_id]
+
+    def run(self):
+        try:
+            self.sio.connect(self.url)
+        except socketio.exceptions.ConnectionError:
+            self.recorder.error('socket.io connect')
+            return
+        operations = {'upload': self.upload, 'analyze': self.analyze, 'generate': self.generate}
+        names, weights = zip(*self.mix.items())
+        while time.monotonic() < self.deadline:
+            operations[self.rng.choices(names, weights=weights)[0]]()
+        self.sio.disconnect()
+
+
+def spawn_server(port):
+    """Запускает локальный экземпляр app.py и ждёт его готовности"""
+    env = dict(os.environ, PORT=str(port))
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              start_new_session=hasattr(os, 'killpg'))
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            requests.get(url + '/api/sample', timeout=1)
+            return server, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError('Server did not start')
+
+
+def stop_server(server):
+    """Останавливает сервер вместе с процессом перезагрузчика Flask"""
+    if hasattr(os, 'killpg'):
+        os.killpg(server.pid, 15)
+    else:
+        server.terminate()
+    server.wait()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочное тестирование HTTP и socket.io API')
+    parser.add_argument('--url', help='адрес запущенного сервера; без него запускается локальный app.py')
+    parser.add_argument('--server-pid', type=int, help='PID сервера для измерения CPU/RSS при --url')
+    parser.add_argument('--clients', type=int, default=10, help='число одновременных клиентов')
+    parser.add_argument('--duration', type=float, default=30, help='длительность теста, с')
+    parser.add_argument('--mix', default='upload=3,analyze=2,generate=1', help='веса операций')
+    parser.add_argument('--nodes', type=int, default=100, help='число вершин синтетических графов')
+    parser.add_argument('--edges', type=int, default=300, help='число рёбер синтетических графов')
+    parser.add_argument('--null-samples', type=int, default=0, help='null_samples для /api/analyze')
+    parser.add_argument('--same-graph', action='store_true', help='все клиенты используют один граф')
+    parser.add_argument('--generation-timeout', type=float, default=300, help='таймаут одной операции, с')
+    args = parser.parse_args()
+
+    server = None
+    url, pid = args.url, args.server_pid
+    if url is None:
+        server, url = spawn_server(free_port())
+        pid = server.pid
+    sampler = ProcessSampler(pid) if pid else None
+
+    recorder = Recorder()
+    mix = parse_mix(args.mix)
+    graphs = [synthetic_graph(args.nodes, args.edges, 0 if args.same_graph else i) for i in range(args.clients)]
+    print(f'{args.clients} clients, {args.duration:.0f}s, mix {mix}, graphs {args.nodes} nodes / {args.edges} edges')
+
+    try:
+        if sampler:
+            sampler.start()
+        started = time.monotonic()
+        clients = [SimulatedClient(i, url, mix, graphs[i], recorder, started + args.duration,
+                                   args.null_samples, args.generation_timeout) for i in range(args.clients)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        duration = time.monotonic() - started
+    finally:
+        if sampler:
+            sampler.stop()
+        if server is not None:
+            stop_server(server)
+
+    print(recorder.report(duration))
+    if sampler:
+        print(sampler.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import csv
+import io
+import sys
+import numpy as np
+
+# Столбцы экспорта матрицы участия
+PARTICIPATION_COLUMNS = ['node'] + [f'M{i}' for i in range(16)]
+
+
+class ParticipationIndex:
+    """Участие вершин в классах триад: matrix[v, k] — число триад класса k, содержащих вершину v"""
+
+    def __init__(self, matrix, labels):
+        self.matrix = np.asarray(matrix, dtype=np.int64)
+        self.labels = list(labels)
+        self._orders = {}
+        # занимаемая память с учётом до 16 кэшируемых сортировок, по ней ограничивается кэш индексов
+        self.nbytes = 2 * self.matrix.nbytes + sys.getsizeof(self.labels) + sum(map(sys.getsizeof, self.labels))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _order(self, motif):
+        """Вершины по убыванию участия в мотиве (при равенстве — по номеру), сортировка кэшируется"""
+        if motif not in self._orders:
+            self._orders[motif] = np.argsort(-self.matrix[:, motif], kind='stable')
+        return self._orders[motif]
+
+    def page(self, motif, offset=0, limit=50):
+        """Страница вершин, отсортированных по участию в мотиве"""
+        nodes = self._order(motif)[offset:offset + limit]
+        return [{'id': self.labels[node], 'count': int(self.matrix[node, motif])} for node in nodes.tolist()]
+
+    def top_nodes(self, k=10):
+        """k вершин с наибольшим участием для каждого из 16 мотивов"""
+        return {motif: self.page(motif, 0, k) for motif in range(16)}
+
+    def iter_csv(self, chunk_rows=10000):
+        """Построчный CSV всей матрицы: вершина и 16 счётчиков"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(PARTICIPATION_COLUMNS)
+        for start in range(0, len(self), chunk_rows):
+            rows = self.matrix[start:start + chunk_rows].tolist()
+            writer.writerows([label] + row for label, row in zip(self.labels[start:start + chunk_rows], rows))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.getvalue():
+            yield buffer.getvalue()
+
+    def to_npz(self, file):
+        """Сохраняет матрицу и метки вершин в сжатый архив NumPy"""
+        np.savez_compressed(file, participation=self.matrix, labels=np.array(self.labels, dtype=str))
@@ -0,0 +1,119 @@
+import csv
+import io
+import math
+from openpyxl import Workbook
+
+# Заголовки таблиц отчёта
+REPORT_HEADERS = {
+    'census': ['graph', 'motif', 'count', 'probability', 'null_mean', 'null_std', 'z_score', 'p_value'],
+    'metrics': ['graph', 'metric', 'value'],
+    'ensemble': ['member'] + [f'M{i}' for i in range(16)]
+}
+
+
+def _value(value):
+    """Приводит numpy-скаляры и NaN к значениям, пригодным для записи в ячейку"""
+    if value is None:
+        return None
+    if isinstance(value, (bool, str)):
+        return value
+    value = value.item() if hasattr(value, 'item') else value
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def census_rows(name, counts, significance=None):
+    """Строки таблицы переписи мотивов одного графа"""
+    total = sum(int(c) for c in counts)
+    for i, count in enumerate(counts):
+        row = [name, f'M{i}', int(count), int(count) / total if total else 0]
+        if significance is not None:
+            row += [_value(significance[key][i]) for key in ('null_mean', 'null_std', 'z_scores', 'p_values')]
+        else:
+            row += [None] * 4
+        yield row
+
+
+def metrics_rows(name, metrics):
+    """Строки таблицы метрик одного графа; гистограммы степеней остаются только в JSON"""
+    for key in sorted(metrics):
+        if not isinstance(metrics[key], dict):
+            yield [name, key, _value(metrics[key])]
+
+
+class EnsembleStatistics:
+    """Накапливает статистики мотивов по членам ансамбля за постоянную память (метод Уэлфорда)"""
+
+    def __init__(self):
+        self.members = 0
+        self.mean = [0.0] * 16
+        self.m2 = [0.0] * 16
+        self.min = [None] * 16
+        self.max = [None] * 16
+
+    def add(self, counts):
+        self.members += 1
+        for i, count in enumerate(counts):
+            count = int(count)
+            delta = count - self.mean[i]
+            self.mean[i] += delta / self.members
+            self.m2[i] += delta * (count - self.mean[i])
+            self.min[i] = count if self.min[i] is None else min(self.min[i], count)
+            self.max[i] = count if self.max[i] is None else max(self.max[i], count)
+
+    def summary_rows(self):
+        std = [math.sqrt(m2 / (self.members - 1)) if self.members > 1 else 0.0 for m2 in self.m2]
+        yield ['mean'] + self.mean
+        yield ['std'] + std
+        yield ['min'] + self.min
+        yield ['max'] + self.max
+
+
+def report_rows(items, ensemble=False):
+    """Обходит элементы отчёта один раз и выдаёт пары (таблица, строка).
+
+    items — итерируемое из кортежей (name, counts, significance, metrics).
+    """
+    stats = EnsembleStatistics() if ensemble else None
+    for name, counts, significance, metrics in items:
+        for row in census_rows(name, counts, significance):
+            yield 'census', row
+        if metrics:
+            for row in metrics_rows(name, metrics):
+                yield 'metrics', row
+        if stats is not None:
+            stats.add(counts)
+            yield 'ensemble', [name] + [int(c) for c in counts]
+    if stats is not None and stats.members:
+        for row in stats.summary_rows():
+            yield 'ensemble', row
+
+
+def iter_csv(rows, table='census'):
+    """Потоково сериализует одну таблицу отчёта в CSV"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REPORT_HEADERS[table])
+    for row_table, row in rows:
+        if row_table != table:
+            continue
+        writer.writerow(row)
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_xlsx(rows, path, ensemble=False):
+    """Записывает отчёт в xlsx в потоковом режиме openpyxl (write-only)"""
+    workbook = Workbook(write_only=True)
+    tables = ['census', 'metrics'] + (['ensemble'] if ensemble else [])
+    sheets = {}
+    for table in tables:
+        sheets[table] = workbook.create_sheet(title=table.capitalize())
+        sheets[table].append(REPORT_HEADERS[table])
+    for table, row in rows:
+        sheets[table].append([_value(value) for value in row])
+    workbook.save(path)
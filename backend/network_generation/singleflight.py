@@ -0,0 +1,63 @@
+import threading
+
+
+class Flight:
+    """Одно выполняющееся вычисление и подписанные на него сессии"""
+
+    def __init__(self, key):
+        self.key = key
+        self.subscribers = []
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Ждёт завершения вычисления и возвращает его результат или пробрасывает ошибку"""
+        if not self.done.wait(timeout):
+            raise TimeoutError(f'Computation {self.key} is still running')
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Объединяет одинаковые одновременные вычисления: первый запрос выполняет работу,
+    остальные присоединяются к нему и получают тот же прогресс и результат"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def join(self, key, subscriber=None):
+        """Возвращает (flight, leader); leader=True, если вызывающий должен выполнить вычисление"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = Flight(key)
+                self._flights[key] = flight
+            if subscriber is not None:
+                flight.subscribers.append(subscriber)
+            return flight, leader
+
+    def subscribers(self, flight):
+        with self._lock:
+            return list(flight.subscribers)
+
+    def update_progress(self, flight, progress):
+        """Сохраняет последний прогресс и возвращает текущих подписчиков"""
+        with self._lock:
+            flight.progress = progress
+            return list(flight.subscribers)
+
+    def finish(self, flight, result=None, error=None):
+        """Завершает вычисление и возвращает подписчиков, которым нужно отправить результат"""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.result = result
+            flight.error = error
+            flight.done.set()
+            return list(flight.subscribers)
+
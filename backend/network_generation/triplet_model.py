@@ -1,9 +1,44 @@
+import time
 import networkx as nx
+import numpy as np
 from dotmotif import GrandIsoExecutor
-from random import randrange, choices, choice
+from random import Random
 from itertools import permutations
 from typing import Callable, Optional
 from .triplets import motifs, motifs_edges, motifs_digraphs
+from .utils import IncrementalGraphMetrics
+from .census import graph_to_arrays, triad_census, motif_distance
+
+# Упорядоченные пары вершин тройки (x0, x1, x2); бит i маски рёбер тройки соответствует паре _TRIPLE_PAIRS[i]
+_TRIPLE_PAIRS = [(0, 1), (1, 0), (0, 2), (2, 0), (1, 2), (2, 1)]
+_PERMUTATIONS = list(permutations(range(3)))
+
+
+def _pattern_motifs():
+    """Номер мотива для каждой из 64 масок рёбер тройки"""
+    table = np.zeros(64, dtype=np.int64)
+    for pattern in range(64):
+        triangle = nx.DiGraph()
+        triangle.add_nodes_from(range(3))
+        triangle.add_edges_from(pair for i, pair in enumerate(_TRIPLE_PAIRS) if pattern >> i & 1)
+        table[pattern] = [i for i in range(16) if nx.is_isomorphic(motifs_digraphs[i], triangle)][0]
+    return table
+
+
+def _placement_masks():
+    """Маска рёбер мотива при каждой перестановке вершин тройки (в порядке permutations)"""
+    bits = {pair: 1 << i for i, pair in enumerate(_TRIPLE_PAIRS)}
+    table = np.zeros((16, len(_PERMUTATIONS)), dtype=np.int64)
+    for motif in range(16):
+        for j, perm in enumerate(_PERMUTATIONS):
+            nodes = dict(zip('ABC', perm))
+            table[motif, j] = sum(bits[nodes[a], nodes[b]] for a, b in motifs_edges[motif])
+    return table
+
+
+_PATTERN_MOTIF = _pattern_motifs()
+_PLACEMENT_MASK = _placement_masks()
+_POPCOUNT = np.array([bin(i).count('1') for i in range(64)], dtype=np.int64)
 
 
 class SubgraphStructure:
@@ -16,22 +51,22 @@ class SubgraphStructure:
                 b for a, b in motifs[0].list_edge_constraints().keys())
             self.probability = 0
 
-    def __init__(self, graph, motif_types):
+    def __init__(self, graph, motif_types, engine='dotmotif', participation=False):
         self.motif_subgraphs = {}
-        E = GrandIsoExecutor(graph=graph)
         self.motifs_sum = 0
         self.graph = graph
-        self.inv_graph = nx.difference(nx.complete_graph(graph.nodes(), nx.DiGraph()), graph)
-        E_inv = GrandIsoExecutor(graph=self.inv_graph)
+        self.participation = None  # участие вершин в классах триад, в порядке graph.nodes()
+        if participation:
+            # матрица участия считается тем же проходом, что и перепись
+            counts, self.participation = triad_census(*graph_to_arrays(graph), participation=True)
+            counts = counts.tolist()
+        elif engine == 'numpy':
+            # те же счётчики, что и у dotmotif, без построения дополнения графа
+            counts = triad_census(*graph_to_arrays(graph)).tolist()
+        else:
+            counts = self._dotmotif_counts(graph, motif_types)
         for i in range(len(motif_types)):
-            if i == 0:
-                motif_count = len(E_inv.find(motif_types[15]))  # full
-            elif i == 1:
-                motif_count = len(E_inv.find(motif_types[14]))  # oneway twoway twoway
-            elif i == 2:
-                motif_count = len(E_inv.find(motif_types[8]))  # noway twoway twoway
-            else:
-                motif_count = len(E.find(motif_types[i]))
+            motif_count = counts[i]
             self.motif_subgraphs[motif_types[i]] = self.SubgraphType(motif_types[i], motif_count, i)
             self.motifs_sum += motif_count
             print(i, motif_types[i], motif_count)
@@ -43,12 +78,32 @@ class SubgraphStructure:
                 self.motif_subgraphs[x].probability = self.motif_subgraphs[x].count / self.motifs_sum
                 self.left_probabilities[self.motif_subgraphs[x].index] = self.motif_subgraphs[x].probability
 
+    def _dotmotif_counts(self, graph, motif_types):
+        """Считает мотивы поиском dotmotif; пустые и почти пустые триады ищутся в дополнении графа"""
+        E = GrandIsoExecutor(graph=graph)
+        self.inv_graph = nx.difference(nx.complete_graph(graph.nodes(), nx.DiGraph()), graph)
+        E_inv = GrandIsoExecutor(graph=self.inv_graph)
+        counts = []
+        for i in range(len(motif_types)):
+            if i == 0:
+                motif_count = len(E_inv.find(motif_types[15]))  # full
+            elif i == 1:
+                motif_count = len(E_inv.find(motif_types[14]))  # oneway twoway twoway
+            elif i == 2:
+                motif_count = len(E_inv.find(motif_types[8]))  # noway twoway twoway
+            else:
+                motif_count = len(E.find(motif_types[i]))
+            counts.append(motif_count)
+        return counts
+
 
 class RandomGraphGenerator:
-    def __init__(self, graph, motif_types) -> None:
+    def __init__(self, graph, motif_types, engine='dotmotif') -> None:
         self.N = len(graph.nodes())
         self.M = len(graph.edges())
-        self.subgraphStructure = SubgraphStructure(graph, motif_types)
+        census_started = time.monotonic()
+        self.subgraphStructure = SubgraphStructure(graph, motif_types, engine)
+        self.census_seconds = time.monotonic() - census_started  # не входит в time_budget генерации
         self.motif_types = motif_types
         self.possible_motifs = {
             0: list(range(16)),
@@ -69,25 +124,74 @@ class RandomGraphGenerator:
             15: [15]
         }
         self.progress_callback = None  # для отслеживания прогресса
+        self.live_metrics = IncrementalGraphMetrics(self.N)  # метрики генерируемого графа
+        self.generation_report = None  # итоги последнего запуска генерации
 
     def set_progress_callback(self, callback: Callable[[int, int], None]):
         """Устанавливает callback для отслеживания прогресса"""
         self.progress_callback = callback
 
-    def wegner_multiplet_model(self):
+    def wegner_multiplet_model(self, time_budget: Optional[float] = None, iteration_budget: Optional[int] = None,
+                               seed: Optional[int] = None, batch_size: Optional[int] = None):
+        """Генерирует граф; при исчерпании бюджета времени (с) или итераций возвращает построенный к этому моменту.
+
+        time_budget ограничивает только размещение рёбер: перепись образца выполняется
+        раньше, в конструкторе, и её время отдаётся отдельно как census_seconds.
+        Без бюджетов генерация всё равно останавливается на пределе M * 100 итераций
+        (stop_reason 'max_iterations'). С batch_size тройки обрабатываются пакетами
+        непересекающихся по вершинам троек.
+        """
         print('wegner_multiplet_model')
         new_graph = nx.DiGraph()
         new_graph.add_nodes_from([i for i in range(self.N)])
+        self.live_metrics = IncrementalGraphMetrics(self.N)
 
-        iteration = 0
         max_iterations = self.M * 100
+        if iteration_budget is not None:
+            max_iterations = min(max_iterations, iteration_budget)
+        started = time.monotonic()
+        deadline = started + time_budget if time_budget is not None else None
+
+        if batch_size and self.N >= 3:
+            iteration, stop_reason = self._batched_placement(new_graph, seed, batch_size, max_iterations, deadline)
+        else:
+            iteration, stop_reason = self._sequential_placement(new_graph, Random(seed), max_iterations, deadline)
 
-        while len(new_graph.edges()) < self.M and iteration < max_iterations:
+        if stop_reason == 'max_iterations':
+            print(f"Warning: Reached maximum iterations ({max_iterations})")
+            # бюджетом считается только предел, заданный вызывающим
+            if iteration_budget is not None and iteration_budget <= self.M * 100:
+                stop_reason = 'iteration_budget'
+
+        src, dst = zip(*new_graph.edges()) if new_graph.number_of_edges() else ((), ())
+        self.generation_report = {
+            'edges': new_graph.number_of_edges(),
+            'target_edges': self.M,
+            'iterations': iteration,
+            'elapsed': time.monotonic() - started,
+            'census_seconds': self.census_seconds,
+            'motif_distance': motif_distance(triad_census(src, dst, self.N),
+                                             self.subgraphStructure.left_probabilities),
+            'stop_reason': stop_reason,
+            'budget_exhausted': stop_reason in ('time_budget', 'iteration_budget'),
+            'batch_size': batch_size
+        }
+
+        return new_graph
+
+    def _sequential_placement(self, new_graph, rng, max_iterations, deadline):
+        """Размещает рёбра по одной тройке за итерацию; возвращает (число итераций, причина остановки)"""
+        iteration = 0
+        while len(new_graph.edges()) < self.M:
+            if iteration >= max_iterations:
+                return iteration, 'max_iterations'
+            if deadline is not None and time.monotonic() >= deadline:
+                return iteration, 'time_budget'
 
             iteration += 1
 
             # тройка вершин
-            a, b, c = randrange(self.N), randrange(self.N), randrange(self.N)
+            a, b, c = rng.randrange(self.N), rng.randrange(self.N), rng.randrange(self.N)
             if a == b or b == c or a == c:
                 continue
 
@@ -98,11 +202,11 @@ class RandomGraphGenerator:
 
             try:
                 # Выбираем случайный мотив с учетом весов
-                rnd_motif_subgraph = choices(self.possible_motifs[cur_motif], weights=possible_motifs)[0]
+                rnd_motif_subgraph = rng.choices(self.possible_motifs[cur_motif], weights=possible_motifs)[0]
             except ValueError as e:
                 # если weights все нулевые или negative, выбираем случайный
                 print(f"Error: {e}")
-                rnd_motif_subgraph = choice(self.possible_motifs[cur_motif])
+                rnd_motif_subgraph = rng.choice(self.possible_motifs[cur_motif])
 
             # Находим оптимальную перестановку вершин
             best_dict = None
@@ -126,17 +230,85 @@ class RandomGraphGenerator:
 
             # Добавляем ребра в граф
             if best_dict:
-                new_graph.add_edges_from([(best_dict[a], best_dict[b])
-                                          for a, b in motifs_edges[rnd_motif_subgraph]])
+                for a, b in motifs_edges[rnd_motif_subgraph]:
+                    if self.live_metrics.add_edge(best_dict[a], best_dict[b]):
+                        new_graph.add_edge(best_dict[a], best_dict[b])
 
                 if self.progress_callback:
                     self.progress_callback(
                         len(new_graph.edges()), self.M)
 
-            # Обновляем структуру мотивов
-            structure = SubgraphStructure(new_graph, self.motif_types)
+        return iteration, 'complete'
 
-        if iteration >= max_iterations:
-            print(f"Warning: Reached maximum iterations ({max_iterations})")
+    def _batched_placement(self, new_graph, seed, batch_size, max_iterations, deadline):
+        """Размещает рёбра пакетами непересекающихся по вершинам троек.
 
-        return new_graph
+        У троек пакета нет общих пар вершин, поэтому их рёбра не конфликтуют: пакет
+        классифицируется и размещается векторно по состоянию графа до пакета, что
+        совпадает с последовательным размещением тех же троек в любом порядке.
+        """
+        rng = np.random.default_rng(seed)
+        N = self.N
+        batch_size = max(1, min(batch_size, N // 3))
+        pairs = np.array(_TRIPLE_PAIRS)
+        pair_bits = np.arange(len(_TRIPLE_PAIRS))
+
+        # накопленные вероятности выбора мотива для каждого текущего мотива тройки
+        possible = np.zeros((16, 16), dtype=bool)
+        for cur_motif, targets in self.possible_motifs.items():
+            possible[cur_motif, targets] = True
+        weights = np.where(possible, np.asarray(self.subgraphStructure.left_probabilities, dtype=np.float64), 0.0)
+        no_weights = weights.sum(axis=1) == 0
+        weights[no_weights] = possible[no_weights]  # если все веса нулевые, выбираем равномерно
+        cumulative = np.cumsum(weights / weights.sum(axis=1, keepdims=True), axis=1)
+        cumulative[:, -1] = 1.0
+
+        keys = np.empty(0, dtype=np.int64)  # отсортированные ключи u * N + v построенных рёбер
+        edges = 0
+        iteration = 0
+        while edges < self.M:
+            if iteration >= max_iterations:
+                return iteration, 'max_iterations'
+            if deadline is not None and time.monotonic() >= deadline:
+                return iteration, 'time_budget'
+
+            size = min(batch_size, max_iterations - iteration)
+            triples = rng.choice(N, size=3 * size, replace=False).reshape(size, 3)
+
+            # маска уже построенных рёбер каждой тройки
+            pair_keys = triples[:, pairs[:, 0]] * N + triples[:, pairs[:, 1]]
+            found = np.minimum(np.searchsorted(keys, pair_keys), max(len(keys) - 1, 0))
+            exists = keys[found] == pair_keys if len(keys) else np.zeros(pair_keys.shape, dtype=bool)
+            current = (exists << pair_bits).sum(axis=1)
+
+            # случайный мотив с учетом весов и перестановка вершин с наименьшей разницей рёбер
+            target = (rng.random(size)[:, None] < cumulative[_PATTERN_MOTIF[current]]).argmax(axis=1)
+            masks = _PLACEMENT_MASK[target]
+            dif = _POPCOUNT[current[:, None] | masks] - _POPCOUNT[masks]
+            added = masks[np.arange(size), dif.argmin(axis=1)] & ~current
+
+            # пакет обрезается на тройке, после которой рёбер становится не меньше M,
+            # а у этой тройки отбрасываются рёбра сверх M
+            enough = np.cumsum(_POPCOUNT[added]) >= self.M - edges
+            if enough.any():
+                size = int(enough.argmax()) + 1
+                triples, added = triples[:size], added[:size]
+                for _ in range(int(_POPCOUNT[added].sum()) - (self.M - edges)):
+                    added[-1] &= added[-1] - 1
+            iteration += size
+
+            rows, cols = np.nonzero((added[:, None] >> pair_bits) & 1)
+            new_edges = list(zip(triples[rows, pairs[cols, 0]].tolist(), triples[rows, pairs[cols, 1]].tolist()))
+            if not new_edges:
+                continue
+            for u, v in new_edges:
+                self.live_metrics.add_edge(u, v)
+            new_graph.add_edges_from(new_edges)
+            new_keys = np.sort(triples[rows, pairs[cols, 0]] * N + triples[rows, pairs[cols, 1]])
+            keys = np.insert(keys, np.searchsorted(keys, new_keys), new_keys)
+            edges += len(new_edges)
+
+            if self.progress_callback:
+                self.progress_callback(edges, self.M)
+
+        return iteration, 'complete'
@@ -2,10 +2,11 @@ import networkx as nx
 import numpy as np
 
 
-def graph_to_json(G):
-    """Конвертирует граф NetworkX в JSON формат"""
-    nodes = [{"id": str(node)} for node in G.nodes()]
-    edges = [{"source": str(source), "target": str(target)} for source, target in G.edges()]
+def graph_to_json(G, labels=None):
+    """Конвертирует граф NetworkX в JSON формат, возвращая исходные метки вершин из таблицы labels"""
+    label = labels.__getitem__ if labels is not None else (lambda node: node)
+    nodes = [{"id": str(label(node))} for node in G.nodes()]
+    edges = [{"source": str(label(source)), "target": str(label(target))} for source, target in G.edges()]
 
     return {
         "nodes": nodes,
@@ -22,71 +23,55 @@ def calculate_graph_metrics(G):
     metrics['num_edges'] = G.number_of_edges()
     metrics['density'] = nx.density(G)
 
+    # Петли, взаимные пары и распределения степеней
+    metrics.update(calculate_summary_statistics(G))
+
     # Степени
     if metrics['num_nodes'] > 0:
-        in_degrees = [d for n, d in G.in_degree()]
-        out_degrees = [d for n, d in G.out_degree()]
-
-        metrics['avg_in_degree'] = sum(in_degrees) / metrics['num_nodes']
-        metrics['avg_out_degree'] = sum(out_degrees) / metrics['num_nodes']
-        metrics['max_in_degree'] = max(in_degrees) if in_degrees else 0
-        metrics['max_out_degree'] = max(out_degrees) if out_degrees else 0
-
-    # Сильная связность
-    strong_components = list(nx.strongly_connected_components(G))
-    if strong_components:
-        largest_strong = max(strong_components, key=len)
-        metrics['strongly_connected_nodes'] = len(largest_strong)
-        metrics['strongly_connected'] = len(strong_components) == 1
-
-        G_strong = G.subgraph(largest_strong)
-        if len(largest_strong) > 1:
-            metrics['transitivity'] = nx.transitivity(G_strong)
-        else:
-            metrics['transitivity'] = 0
-    else:
-        metrics['strongly_connected_nodes'] = 0
-        metrics['strongly_connected'] = False
-        metrics['transitivity'] = 0
+        metrics['avg_in_degree'] = metrics['num_edges'] / metrics['num_nodes']
+        metrics['avg_out_degree'] = metrics['num_edges'] / metrics['num_nodes']
+        metrics['max_in_degree'] = metrics['in_degree_histogram']['degrees'][-1]
+        metrics['max_out_degree'] = metrics['out_degree_histogram']['degrees'][-1]
 
     # Слабая связность
     weak_components = list(nx.weakly_connected_components(G))
     metrics['weakly_connected'] = len(weak_components) == 1
 
-    # Реципрокность
-    try:
-        metrics['reciprocity'] = nx.overall_reciprocity(G)
-    except:
-        metrics['reciprocity'] = 0
+    # Реципрокность (доля рёбер, у которых есть обратное; совпадает с nx.overall_reciprocity)
+    metrics['reciprocity'] = 2 * metrics['reciprocal_pairs'] / metrics['num_edges'] if metrics['num_edges'] else 0
 
-    # Коэффициент кластеризации
-    try:
-        clustering = nx.clustering(G)
-        metrics['avg_clustering'] = sum(clustering.values()) / len(clustering)
-    except:
-        metrics['avg_clustering'] = 0
+    metrics.update(calculate_global_metrics(G))
 
     return metrics
 
 
-def calculate_graph_metrics(G):
-    """Рассчитывает основные метрики графа"""
-    metrics = {}
+def degree_histogram(degrees):
+    """Гистограмма степеней в сжатом виде: встречающиеся степени и число вершин с каждой из них"""
+    values, counts = np.unique(np.asarray(degrees, dtype=np.int64), return_counts=True)
+    return {'degrees': values.tolist(), 'counts': counts.tolist()}
 
-    # Основные метрики
-    metrics['num_nodes'] = G.number_of_nodes()
-    metrics['num_edges'] = G.number_of_edges()
-    metrics['density'] = nx.density(G)
 
-    # Степени
-    if metrics['num_nodes'] > 0:
-        in_degrees = [d for n, d in G.in_degree()]
-        out_degrees = [d for n, d in G.out_degree()]
+def calculate_summary_statistics(G):
+    """Считает петли, взаимные пары и гистограммы степеней за один векторный проход по рёбрам"""
+    n = G.number_of_nodes()
+    index = {node: i for i, node in enumerate(G)}
+    edges = np.fromiter((index[node] for edge in G.edges() for node in edge), dtype=np.int64,
+                        count=2 * G.number_of_edges()).reshape(-1, 2)
+    src, dst = edges[:, 0], edges[:, 1]
+    loops = src == dst
+    keys = src[~loops] * n + dst[~loops]
+    reverse = dst[~loops] * n + src[~loops]
+    return {
+        'self_loops': int(loops.sum()),
+        'reciprocal_pairs': int(np.isin(keys, reverse).sum()) // 2,
+        'in_degree_histogram': degree_histogram(np.bincount(dst, minlength=n)),
+        'out_degree_histogram': degree_histogram(np.bincount(src, minlength=n))
+    }
+
 
-        metrics['avg_in_degree'] = sum(in_degrees) / metrics['num_nodes']
-        metrics['avg_out_degree'] = sum(out_degrees) / metrics['num_nodes']
-        metrics['max_in_degree'] = max(in_degrees) if in_degrees else 0
-        metrics['max_out_degree'] = max(out_degrees) if out_degrees else 0
+def calculate_global_metrics(G):
+    """Рассчитывает метрики, требующие полного прохода по графу"""
+    metrics = {}
 
     # Сильная связность
     strong_components = list(nx.strongly_connected_components(G))
@@ -105,16 +90,6 @@ def calculate_graph_metrics(G):
         metrics['strongly_connected'] = False
         metrics['transitivity'] = 0
 
-    # Слабая связность
-    weak_components = list(nx.weakly_connected_components(G))
-    metrics['weakly_connected'] = len(weak_components) == 1
-
-    # Реципрокность
-    try:
-        metrics['reciprocity'] = nx.overall_reciprocity(G)
-    except:
-        metrics['reciprocity'] = 0
-
     # Коэффициент кластеризации
     try:
         clustering = nx.clustering(G)
@@ -123,3 +98,83 @@ def calculate_graph_metrics(G):
         metrics['avg_clustering'] = 0
 
     return metrics
+
+
+class IncrementalGraphMetrics:
+    """Поддерживает локальные метрики графа на вершинах 0..N-1 по мере добавления рёбер.
+
+    Каждое добавление ребра обновляет метрики за амортизированное O(1); связность
+    отслеживается системой непересекающихся множеств.
+    """
+
+    def __init__(self, num_nodes):
+        self.num_nodes = num_nodes
+        self.num_edges = 0
+        self.reciprocal_pairs = 0
+        self.self_loops = 0
+        self.edges = set()
+        self.in_degrees = [0] * num_nodes
+        self.out_degrees = [0] * num_nodes
+        self.max_in_degree = 0
+        self.max_out_degree = 0
+        self.parent = list(range(num_nodes))
+        self.size = [1] * num_nodes
+        self.components = num_nodes
+
+    def _find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def add_edge(self, u, v):
+        """Учитывает новое ребро u -> v; повторное ребро игнорируется"""
+        if (u, v) in self.edges:
+            return False
+        self.edges.add((u, v))
+        self.num_edges += 1
+        if u == v:
+            self.self_loops += 1
+        elif (v, u) in self.edges:
+            self.reciprocal_pairs += 1
+
+        self.out_degrees[u] += 1
+        self.in_degrees[v] += 1
+        self.max_out_degree = max(self.max_out_degree, self.out_degrees[u])
+        self.max_in_degree = max(self.max_in_degree, self.in_degrees[v])
+
+        root_u, root_v = self._find(u), self._find(v)
+        if root_u != root_v:
+            if self.size[root_u] < self.size[root_v]:
+                root_u, root_v = root_v, root_u
+            self.parent[root_v] = root_u
+            self.size[root_u] += self.size[root_v]
+            self.components -= 1
+        return True
+
+    def snapshot(self):
+        """Возвращает текущие локальные метрики в формате calculate_graph_metrics"""
+        n = self.num_nodes
+        metrics = {
+            'num_nodes': n,
+            'num_edges': self.num_edges,
+            'density': self.num_edges / (n * (n - 1)) if n > 1 else 0,
+            'weakly_connected': self.components == 1,
+            'self_loops': self.self_loops,
+            'reciprocal_pairs': self.reciprocal_pairs,
+            'reciprocity': 2 * self.reciprocal_pairs / self.num_edges if self.num_edges else 0
+        }
+        if n > 0:
+            metrics['avg_in_degree'] = self.num_edges / n
+            metrics['avg_out_degree'] = self.num_edges / n
+            metrics['max_in_degree'] = self.max_in_degree
+            metrics['max_out_degree'] = self.max_out_degree
+        return metrics
+
+    def finalize(self, G):
+        """Дополняет накопленные метрики глобальными метриками готового графа"""
+        metrics = self.snapshot()
+        metrics['in_degree_histogram'] = degree_histogram(self.in_degrees)
+        metrics['out_degree_histogram'] = degree_histogram(self.out_degrees)
+        metrics.update(calculate_global_metrics(G))
+        return metrics
@@ -0,0 +1,55 @@
+import argparse
+import multiprocessing
+import threading
+import time
+from .jobs import JOB_LEASE, SQLiteJobStore, SQLiteEventBus, execute_generation
+from .labels import intern_graph_json
+
+
+def _heartbeat(store, job, stop):
+    """Продлевает аренду задачи, пока она выполняется"""
+    while not stop.wait(JOB_LEASE / 3):
+        store.heartbeat(job)
+
+
+def run_worker(db_path, poll_interval=0.2):
+    """Цикл вычислительного процесса: забирает задачи из общей очереди и выполняет их"""
+    store = SQLiteJobStore(db_path)
+    bus = SQLiteEventBus(store)
+    while True:
+        claimed = store.claim()
+        if claimed is None:
+            time.sleep(poll_interval)
+            continue
+        job, payload = claimed
+        stop = threading.Event()
+        threading.Thread(target=_heartbeat, args=(store, job, stop), daemon=True).start()
+        try:
+            # граф уже проверен веб-процессом при постановке задачи
+            G, labels = intern_graph_json(payload['original_graph'])
+            execute_generation(store, bus, job, G, labels, payload['budget'], payload['seed'],
+                               payload.get('engine', 'dotmotif'))
+        finally:
+            stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Вычислительные процессы генерации графов')
+    parser.add_argument('--db', required=True, help='файл SQLite с общим состоянием задач')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help='число вычислительных процессов')
+    args = parser.parse_args()
+
+    # создаём схему до запуска процессов
+    SQLiteJobStore(args.db)
+    processes = [multiprocessing.Process(target=run_worker, args=(args.db,), daemon=True)
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    print(f'Started {len(processes)} compute workers on {args.db}')
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import itertools
+import networkx as nx
+import numpy as np
+import pytest
+from network_generation.census import MOTIF_AUTOMORPHISMS, triad_census
+from network_generation.null_model import degree_preserving_randomization, motif_significance
+from network_generation.triplets import motifs_digraphs
+
+
+def random_arrays(n, m, loops, seed):
+    """Случайные массивы рёбер с петлями и повторными рёбрами"""
+    rng = np.random.default_rng(seed)
+    src = rng.integers(0, n, size=m)
+    dst = rng.integers(0, n, size=m)
+    loop_nodes = rng.integers(0, n, size=loops)
+    return np.concatenate([src, loop_nodes]), np.concatenate([dst, loop_nodes])
+
+
+def brute_force(src, dst, n):
+    """Перепись и матрица участия перебором всех троек вершин (петли не учитываются)"""
+    G = nx.DiGraph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from((u, v) for u, v in zip(src.tolist(), dst.tolist()) if u != v)
+    counts = np.zeros(16, dtype=np.int64)
+    matrix = np.zeros((n, 16), dtype=np.int64)
+    for triple in itertools.combinations(range(n), 3):
+        triad = nx.DiGraph(G.subgraph(triple))
+        motif = [i for i in range(16) if nx.is_isomorphic(motifs_digraphs[i], triad)][0]
+        counts[motif] += 1
+        matrix[list(triple), motif] += 1
+    return counts, matrix
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_triad_census_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(3, 12))
+    src, dst = random_arrays(n, int(rng.integers(0, n * (n - 1) + 1)), loops=int(rng.integers(0, 4)), seed=seed)
+    expected_counts, expected_matrix = brute_force(src, dst, n)
+
+    counts, matrix = triad_census(src, dst, n, weighted=False, participation=True)
+    assert counts.tolist() == expected_counts.tolist()
+    assert matrix.tolist() == expected_matrix.tolist()
+    assert triad_census(src, dst, n).tolist() == (expected_counts * MOTIF_AUTOMORPHISMS).tolist()
+
+
+def test_triad_census_small_graphs():
+    counts, matrix = triad_census(np.array([0]), np.array([1]), 2, participation=True)
+    assert counts.sum() == 0
+    assert matrix.shape == (2, 16)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_degree_preserving_randomization(seed):
+    G = nx.gnm_random_graph(60, 300, seed=seed, directed=True)
+    src, dst = (np.array(side, dtype=np.int64) for side in zip(*G.edges()))
+    new_src, new_dst = degree_preserving_randomization(src, dst, 60, rng=np.random.default_rng(seed))
+
+    assert np.bincount(new_src, minlength=60).tolist() == np.bincount(src, minlength=60).tolist()
+    assert np.bincount(new_dst, minlength=60).tolist() == np.bincount(dst, minlength=60).tolist()
+    assert not (new_src == new_dst).any()
+    assert len(np.unique(new_src * 60 + new_dst)) == len(new_src)
+    assert set(zip(new_src.tolist(), new_dst.tolist())) != set(zip(src.tolist(), dst.tolist()))
+
+
+def test_motif_significance_uses_given_census():
+    G = nx.gnm_random_graph(40, 160, seed=1, directed=True)
+    src, dst = (np.array(side, dtype=np.int64) for side in zip(*G.edges()))
+    computed = motif_significance(src, dst, 40, samples=5, seed=2)
+    given = motif_significance(src, dst, 40, samples=5, seed=2, observed=computed['observed'].tolist())
+
+    assert given['observed'].tolist() == computed['observed'].tolist()
+    assert given['p_values'].tolist() == computed['p_values'].tolist()
+    np.testing.assert_array_equal(given['z_scores'], computed['z_scores'])
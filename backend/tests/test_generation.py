@@ -0,0 +1,32 @@
+import networkx as nx
+import pytest
+from network_generation.triplet_model import RandomGraphGenerator
+from network_generation.triplets import motifs
+
+
+@pytest.fixture(scope='module')
+def sample():
+    return nx.gnm_random_graph(60, 240, directed=True, seed=3)
+
+
+def generate(sample, seed, batch_size):
+    generator = RandomGraphGenerator(sample, motifs, 'numpy')
+    G = generator.wegner_multiplet_model(seed=seed, batch_size=batch_size)
+    return G, generator.generation_report
+
+
+@pytest.mark.parametrize('batch_size', [None, 1, 8])
+def test_same_seed_reproduces_graph(sample, batch_size):
+    first, report = generate(sample, 7, batch_size)
+    second, _ = generate(sample, 7, batch_size)
+    assert report['stop_reason'] == 'complete' and report['batch_size'] == batch_size
+    assert sorted(first.edges()) == sorted(second.edges())
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('batch_size', [1, 8, 1000])
+def test_batched_generation_places_exactly_m_edges(sample, seed, batch_size):
+    G, report = generate(sample, seed, batch_size)
+    assert report['stop_reason'] == 'complete'
+    assert G.number_of_edges() == sample.number_of_edges()
+    assert report['edges'] == sample.number_of_edges()
@@ -0,0 +1,82 @@
+import json
+import pytest
+from network_generation.jobs import LocalJobStore, SQLiteJobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteJobStore(str(tmp_path / 'jobs.sqlite'))
+
+
+def make_stale(store, job):
+    """Сдвигает отметку задачи в прошлое, как будто процесс перестал продлевать аренду"""
+    store._connection().execute('UPDATE jobs SET updated = 0 WHERE id = ?', (job,))
+
+
+def test_sqlite_join_claim_finish(store):
+    job, leader = store.join(('graph', 1), {'seed': 1}, subscriber='a')
+    same, follower_leader = store.join(('graph', 1), {'seed': 1}, subscriber='b')
+    assert leader and not follower_leader and same == job
+
+    assert store.claim() == (job, {'seed': 1})
+    assert store.claim() is None
+
+    assert sorted(store.finish(job, result={'edges': 3})) == ['a', 'b']
+    assert store.wait(job, timeout=1) == {'edges': 3}
+    # после завершения одинаковый запрос ставит новую задачу
+    assert store.join(('graph', 1), {'seed': 1})[1]
+
+
+def test_sqlite_finish_error(store):
+    job, _ = store.join(('graph', 2), {}, subscriber='a')
+    store.claim()
+    assert store.finish(job, error='boom') == ['a']
+    with pytest.raises(RuntimeError, match='boom'):
+        store.wait(job, timeout=1)
+
+
+def test_sqlite_stale_job_fails_subscribers(store):
+    job, _ = store.join(('graph', 3), {}, subscriber='a')
+    store.join(('graph', 3), {}, subscriber='b')
+    store.claim()
+    make_stale(store, job)
+
+    assert store.expire_stale() == [job]
+    rows = store._connection().execute('SELECT event, data FROM events').fetchall()
+    assert [event for event, _ in rows] == ['generation_error']
+    data = json.loads(rows[0][1])
+    assert sorted(data['session_ids']) == ['a', 'b'] and data['status'] == 'error'
+
+    # запоздавший процесс не перезаписывает ошибку результатом
+    assert store.finish(job, result={'edges': 3}) == []
+    with pytest.raises(RuntimeError, match='stopped responding'):
+        store.wait(job, timeout=1)
+
+
+def test_sqlite_heartbeat_keeps_job(store):
+    job, _ = store.join(('graph', 4), {})
+    store.claim()
+    make_stale(store, job)
+    store.heartbeat(job)
+    assert store.expire_stale() == []
+
+
+def test_sqlite_wait_timeout(store):
+    job, _ = store.join(('graph', 5), {})
+    with pytest.raises(TimeoutError):
+        store.wait(job, timeout=0.05, poll_interval=0.01)
+
+
+def test_local_join_shares_flight():
+    store = LocalJobStore()
+    job, leader = store.join(('graph', 1), {}, subscriber='a')
+    same, follower_leader = store.join(('graph', 1), {}, subscriber='b')
+    assert leader and not follower_leader and same is job
+
+    with pytest.raises(TimeoutError):
+        store.wait(same, timeout=0.01)
+
+    result = {'edges': 3}
+    assert store.finish(job, result=result) == ['a', 'b']
+    assert store.wait(job) is result and store.wait(same) is result
+    assert store.join(('graph', 1), {})[1]
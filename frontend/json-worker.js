@@ -0,0 +1,5 @@
+// Сериализация больших объектов в JSON вне основного потока страницы
+self.onmessage = (event) => {
+    const text = JSON.stringify(event.data, null, 2);
+    self.postMessage(new Blob([text], { type: 'application/json' }));
+};
@@ -76,7 +76,7 @@ async function handleFiles(files) {
         if (data.success) {
             currentGraphData = data.graph;
             currentMetrics = data.metrics;
-            displayCombinedMetrics(data.metrics, data.graph);
+            displayCombinedMetrics(data.metrics);
             enableButtons();
             showSuccess('Graph uploaded successfully!');
         } else {
@@ -103,7 +103,7 @@ async function loadSampleData() {
         if (data.success) {
             currentGraphData = data.graph;
             currentMetrics = data.metrics;
-            displayCombinedMetrics(data.metrics, data.graph);
+            displayCombinedMetrics(data.metrics);
             enableButtons();
             showSuccess('Sample dataset loaded successfully!');
         } else {
@@ -148,6 +148,25 @@ async function analyzeGraph() {
     }
 }
 
+// Бюджет генерации, заданный пользователем
+function getGenerationBudget() {
+    const timeBudget = parseFloat(document.getElementById('timeBudget')?.value);
+    return Number.isFinite(timeBudget) && timeBudget > 0 ? { time_budget: timeBudget } : {};
+}
+
+// Сообщение о результате генерации с учётом бюджета
+function describeGeneration(generation) {
+    if (!generation) return 'Generation complete!';
+    const distance = generation.motif_distance.toFixed(3);
+    if (generation.budget_exhausted) {
+        return `Budget reached: ${generation.edges} / ${generation.target_edges} arcs, motif distance ${distance}`;
+    }
+    if (generation.stop_reason === 'max_iterations') {
+        return `Iteration limit reached: ${generation.edges} / ${generation.target_edges} arcs, motif distance ${distance}`;
+    }
+    return `Generation complete! Motif distance ${distance}`;
+}
+
 // Генерация нового графа
 async function generateGraph() {
     if (!currentGraphData) return;
@@ -155,7 +174,7 @@ async function generateGraph() {
     // Генерируем уникальный ID сессии
     currentSessionId = Date.now().toString();
 
-    const totalEdges = currentGraphData.edges.length;
+    const totalEdges = currentMetrics.num_edges;
 
     // Показываем прогресс-бар
     const progressContainer = document.getElementById('progressContainer');
@@ -174,7 +193,15 @@ async function generateGraph() {
         generateBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Generating...';
     }
 
+    // Без WebSocket прогресс и результат не придут, поэтому используем синхронный endpoint
+    if (!socket || !socket.connected) {
+        generateLegacy();
+        return;
+    }
+
     try {
+        await subscribeToSession(currentSessionId);
+
         const response = await fetch('/api/generate_stream', {
             method: 'POST',
             headers: {
@@ -182,7 +209,8 @@ async function generateGraph() {
             },
             body: JSON.stringify({
                 original_graph: currentGraphData,
-                session_id: currentSessionId
+                session_id: currentSessionId,
+                ...getGenerationBudget()
             })
         });
 
@@ -192,13 +220,8 @@ async function generateGraph() {
             throw new Error(data.error || 'Failed to start generation');
         }
 
-        console.log('Generation started with session:', data.session_id);
-
-        // Запускаем polling для проверки прогресса
-        startProgressPolling();
-
-        // Также запускаем обычную генерацию для совместимости
-        generateLegacy();
+        // Прогресс и результат приходят через WebSocket
+        console.log(data.message + ', session:', data.session_id);
 
     } catch (error) {
         showError('Error starting generation: ' + error.message);
@@ -215,7 +238,8 @@ async function generateLegacy() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                original_graph: currentGraphData
+                original_graph: currentGraphData,
+                ...getGenerationBudget()
             })
         });
 
@@ -228,13 +252,13 @@ async function generateLegacy() {
 
         if (data.success) {
             // Показываем 100%
-            updateProgressDisplay(100, currentGraphData.edges.length, currentGraphData.edges.length);
-            document.getElementById('progressDetails').textContent = 'Generation complete!';
+            updateProgressDisplay(100, currentMetrics.num_edges, currentMetrics.num_edges);
+            document.getElementById('progressDetails').textContent = describeGeneration(data.generation);
 
             // Обновляем данные
             currentGraphData = data.graph;
             currentMetrics = data.metrics;
-            displayCombinedMetrics(data.metrics, data.graph);
+            displayCombinedMetrics(data.metrics);
 
             showSuccess('New graph generated successfully!');
 
@@ -331,15 +355,14 @@ async function downloadJson() {
             motifAnalysis: motifAnalysis?.success ? motifAnalysis : null,
             metadata: {
                 generatedAt: new Date().toISOString(),
-                nodesCount: currentGraphData.nodes.length,
-                edgesCount: currentGraphData.edges.length,
+                nodesCount: currentMetrics.num_nodes,
+                edgesCount: currentMetrics.num_edges,
                 fileName: `graph_complete_${new Date().toISOString().split('T')[0]}.json`
             }
         };
 
-        // Создаем и скачиваем JSON файл
-        const dataStr = JSON.stringify(fullData, null, 2);
-        const dataBlob = new Blob([dataStr], { type: 'application/json' });
+        // Создаем и скачиваем JSON файл (сериализация в Web Worker)
+        const dataBlob = await serializeJsonInWorker(fullData);
         const url = window.URL.createObjectURL(dataBlob);
         const a = document.createElement('a');
         a.href = url;
@@ -357,22 +380,44 @@ async function downloadJson() {
     }
 }
 
-function startProgressPolling() {
-    if (progressInterval) {
-        clearInterval(progressInterval);
-    }
+// Скачивание отчёта (перепись мотивов и метрики) в формате .xlsx
+async function downloadReport() {
+    if (!currentGraphData) return;
 
-    progressInterval = setInterval(async () => {
-        if (!currentSessionId) return;
+    showLoading('Preparing report download...');
 
-        try {
-            // Здесь можно добавить endpoint для получения прогресса
-            // Но для простоты будем использовать эмуляцию прогресса
-            updateProgressSimulation();
-        } catch (error) {
-            console.error('Error checking progress:', error);
+    try {
+        const response = await fetch('/api/export', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                graphs: [{ name: 'graph', graph: currentGraphData, metrics: currentMetrics }],
+                format: 'xlsx'
+            })
+        });
+
+        if (!response.ok) {
+            throw new Error('Export failed');
         }
-    }, 500);
+
+        const blob = await response.blob();
+        const url = window.URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = `graph_report_${new Date().toISOString().split('T')[0]}.xlsx`;
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+        window.URL.revokeObjectURL(url);
+
+        showSuccess('Report download started!');
+    } catch (error) {
+        showError('Error downloading report: ' + error.message);
+    } finally {
+        hideLoading();
+    }
 }
 
 // Управление прогресс-баром
@@ -388,25 +433,6 @@ function startProgressTracking(totalEdges) {
     }
 }
 
-function updateProgressSimulation() {
-    const progressContainer = document.getElementById('progressContainer');
-    if (!progressContainer || progressContainer.style.display === 'none') return;
-
-    const currentProgress = parseInt(document.getElementById('progressFill').style.width) || 0;
-    const totalEdges = currentGraphData.edges.length;
-
-    if (currentProgress < 95) {
-        // Имитация прогресса
-        const increment = Math.floor(Math.random() * 5);
-        const newProgress = Math.min(95, currentProgress + increment);
-        const currentEdges = Math.floor((newProgress / 100) * totalEdges);
-
-        updateProgressDisplay(newProgress, currentEdges, totalEdges);
-        document.getElementById('progressDetails').textContent =
-            `Generating edges: ${currentEdges} / ${totalEdges}`;
-    }
-}
-
 function updateProgressDisplay(percentage, current, total) {
     const progressFill = document.getElementById('progressFill');
     const progressPercentage = document.getElementById('progressPercentage');
@@ -437,11 +463,55 @@ function completeProgress() {
     }, 2000);
 }
 
-// Отображение объединенных метрик и информации
-function displayCombinedMetrics(metrics, graphData) {
+// Сериализует объект в JSON-файл в Web Worker, не блокируя интерфейс
+function serializeJsonInWorker(data) {
+    return new Promise((resolve, reject) => {
+        const worker = new Worker('json-worker.js');
+        worker.onmessage = (event) => {
+            worker.terminate();
+            resolve(event.data);
+        };
+        worker.onerror = (error) => {
+            worker.terminate();
+            reject(new Error(error.message));
+        };
+        worker.postMessage(data);
+    });
+}
+
+// Гистограмма степеней из сжатого представления сервера, не более maxBars столбцов
+function renderDegreeHistogram(title, histogram, maxBars = 30) {
+    if (!histogram || histogram.degrees.length === 0) return '';
+
+    const maxDegree = histogram.degrees[histogram.degrees.length - 1];
+    const binWidth = Math.max(1, Math.ceil((maxDegree + 1) / maxBars));
+    const bins = new Array(Math.ceil((maxDegree + 1) / binWidth)).fill(0);
+    histogram.degrees.forEach((degree, i) => {
+        bins[Math.floor(degree / binWidth)] += histogram.counts[i];
+    });
+    const peak = Math.max(...bins);
+
+    const bars = bins.map((count, i) => {
+        const from = i * binWidth;
+        const range = binWidth === 1 ? `${from}` : `${from}-${from + binWidth - 1}`;
+        const height = peak ? (100 * count / peak).toFixed(1) : 0;
+        return `<div class="degree-bar" style="height: ${height}%" title="Degree ${range}: ${count} vertices"></div>`;
+    }).join('');
+
+    return `
+        <div class="degree-histogram">
+            <div class="metric-label">${title}</div>
+            <div class="degree-bars">${bars}</div>
+            <div class="degree-axis"><span>0</span><span>${maxDegree}</span></div>
+        </div>
+    `;
+}
+
+// Отображение объединенных метрик и информации (только по метрикам сервера, без списка рёбер)
+function displayCombinedMetrics(metrics) {
     const metricsDiv = document.getElementById('combinedMetrics');
 
-    if (!metrics || !graphData) {
+    if (!metrics) {
         metricsDiv.innerHTML = `
             <div class="metrics-placeholder">
                 <i class="fas fa-chart-network fa-3x"></i>
@@ -455,8 +525,8 @@ function displayCombinedMetrics(metrics, graphData) {
     currentMetrics = metrics;
 
     // Базовые метрики
-    const nodeCount = metrics.num_nodes || graphData.nodes.length;
-    const edgeCount = metrics.num_edges || graphData.edges.length;
+    const nodeCount = metrics.num_nodes;
+    const edgeCount = metrics.num_edges;
     const density = metrics.density || (nodeCount > 1 ? (edgeCount / (nodeCount * (nodeCount - 1))).toFixed(4) : '0.0000');
 
     // Форматируем значения
@@ -569,6 +639,24 @@ function displayCombinedMetrics(metrics, graphData) {
                             <div class="metric-label">Avg Clustering</div>
                         </div>
                     </div>
+                    <div class="metric-card">
+                        <div class="metric-icon">
+                            <i class="fas fa-arrows-rotate"></i>
+                        </div>
+                        <div class="metric-content">
+                            <div class="metric-value">${metrics.self_loops ?? 'N/A'}</div>
+                            <div class="metric-label">Self-Loops</div>
+                        </div>
+                    </div>
+                    <div class="metric-card">
+                        <div class="metric-icon">
+                            <i class="fas fa-right-left"></i>
+                        </div>
+                        <div class="metric-content">
+                            <div class="metric-value">${metrics.reciprocal_pairs ?? 'N/A'}</div>
+                            <div class="metric-label">Reciprocal Pairs</div>
+                        </div>
+                    </div>
                 </div>
             </div>
 
@@ -613,34 +701,23 @@ function displayCombinedMetrics(metrics, graphData) {
                         </div>
                     </div>
                 </div>
+                <div class="degree-histograms">
+                    ${renderDegreeHistogram('In-Degree Distribution', metrics.in_degree_histogram)}
+                    ${renderDegreeHistogram('Out-Degree Distribution', metrics.out_degree_histogram)}
+                </div>
             </div>
         </div>
     `;
 }
 
-// Вспомогательные функции
-function countSelfLoops(graphData) {
-    if (!graphData || !graphData.edges) return 0;
-    return graphData.edges.filter(edge => edge.source === edge.target).length;
+// Подписка на события сессии генерации; ответ сервера означает, что клиент уже в комнате сессии
+function subscribeToSession(sessionId) {
+    return new Promise(resolve => socket.emit('subscribe', { session_id: sessionId }, resolve));
 }
 
-function countReciprocalEdges(graphData) {
-    if (!graphData || !graphData.edges) return 0;
-
-    const edgeSet = new Set();
-    let reciprocalCount = 0;
-
-    graphData.edges.forEach(edge => {
-        const edgeKey = `${edge.source}-${edge.target}`;
-        const reverseKey = `${edge.target}-${edge.source}`;
-
-        if (edgeSet.has(reverseKey)) {
-            reciprocalCount++;
-        }
-        edgeSet.add(edgeKey);
-    });
-
-    return reciprocalCount;
+// Событие адресовано текущей сессии (одно событие рассылается всем сессиям общей задачи)
+function isCurrentSession(data) {
+    return (data.session_ids || []).includes(currentSessionId);
 }
 
 // Инициализация WebSocket при загрузке страницы
@@ -651,22 +728,32 @@ function initializeWebSocket() {
 
         socket.on('connect', function() {
             console.log('Connected to WebSocket server');
+            // после переподключения комнаты сервера нужно восстановить
+            if (currentSessionId) {
+                subscribeToSession(currentSessionId);
+            }
         });
 
         socket.on('generation_progress', function(data) {
-            if (data.session_id === currentSessionId) {
+            if (isCurrentSession(data)) {
                 updateProgressDisplay(data.progress, data.current, data.total);
+                if (data.metrics) {
+                    document.getElementById('progressDetails').textContent =
+                        `Density: ${data.metrics.density.toFixed(4)} | ` +
+                        `Reciprocity: ${data.metrics.reciprocity.toFixed(3)} | ` +
+                        `Weakly connected: ${data.metrics.weakly_connected}`;
+                }
             }
         });
 
         socket.on('generation_complete', function(data) {
-            if (data.session_id === currentSessionId) {
+            if (isCurrentSession(data)) {
                 handleGenerationComplete(data);
             }
         });
 
         socket.on('generation_error', function(data) {
-            if (data.session_id === currentSessionId) {
+            if (isCurrentSession(data)) {
                 handleGenerationError(data);
             }
         });
@@ -693,6 +780,8 @@ function displayMotifAnalysis(data) {
 
     // Сортируем мотивы по количеству
     const sortedMotifs = [...data.motifs].sort((a, b) => b.count - a.count);
+    const hasSignificance = data.null_samples > 0;
+    const formatZScore = (value) => (value === undefined || value === null) ? 'N/A' : value.toFixed(2);
 
     let html = `
         <div class="motif-summary">
@@ -709,6 +798,7 @@ function displayMotifAnalysis(data) {
                         <th>Motif ID</th>
                         <th>Count</th>
                         <th>Percentage</th>
+                        ${hasSignificance ? '<th>Z-score</th><th>p-value</th>' : ''}
                     </tr>
                 </thead>
                 <tbody>
@@ -721,6 +811,7 @@ function displayMotifAnalysis(data) {
                 <td><strong>M${motif.id}</strong></td>
                 <td>${motif.count}</td>
                 <td>${percentage}%</td>
+                ${hasSignificance ? `<td>${formatZScore(motif.z_score)}</td><td>${motif.p_value.toFixed(3)}</td>` : ''}
             </tr>
         `;
     });
@@ -745,9 +836,10 @@ function displayMotifAnalysis(data) {
 // Обработка завершения генерации
 function handleGenerationComplete(data) {
     if (data.success) {
+        document.getElementById('progressDetails').textContent = describeGeneration(data.generation);
         currentGraphData = data.graph;
         currentMetrics = data.metrics;
-        displayCombinedMetrics(data.metrics, data.graph);
+        displayCombinedMetrics(data.metrics);
 
         // Показываем 100% на несколько секунд
         setTimeout(() => {
@@ -794,11 +886,13 @@ function enableButtons() {
     const generateBtn = document.getElementById('generateBtn');
     const downloadTxtBtn = document.getElementById('downloadTxtBtn');
     const downloadJsonBtn = document.getElementById('downloadJsonBtn');
+    const downloadReportBtn = document.getElementById('downloadReportBtn');
 
     if (analyzeBtn) analyzeBtn.disabled = false;
     if (generateBtn) generateBtn.disabled = false;
     if (downloadTxtBtn) downloadTxtBtn.disabled = false;
     if (downloadJsonBtn) downloadJsonBtn.disabled = false;
+    if (downloadReportBtn) downloadReportBtn.disabled = false;
 }
 
 // Управление загрузкой